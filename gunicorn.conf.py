@@ -0,0 +1,50 @@
+"""
+Configuração do Gunicorn para produção.
+
+WSGI (padrão, workers com threads):  gunicorn -c gunicorn.conf.py
+ASGI (padrão no docker-compose; necessário para /api/orders/stream/ e /api/orders/{id}/wait/):
+    WEB_SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+
+Variáveis de ambiente:
+    WEB_SERVER_MODE  wsgi | asgi (padrão: wsgi)
+    WEB_BIND         endereço de escuta (padrão: 0.0.0.0:8000)
+    WEB_WORKERS      processos (padrão: 2 * CPUs + 1 com SHARED_CACHE_URL, senão 1;
+                     mais de 1 sem SHARED_CACHE_URL é recusado)
+    WEB_THREADS      threads por processo no modo wsgi (padrão: 4)
+    WEB_TIMEOUT      segundos até reiniciar um worker travado (padrão: 30)
+    WEB_MAX_REQUESTS requisições até reciclar o worker (padrão: 1000, 0 desativa)
+"""
+import multiprocessing
+import os
+
+mode = os.environ.get('WEB_SERVER_MODE', 'wsgi')
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:8000')
+# Sem cache compartilhado (Redis), cada worker teria o seu cache de tokens e de
+# idempotência em memória: nesse caso o padrão é um único worker
+shared_cache = os.environ.get('SHARED_CACHE_URL') or os.environ.get('MENU_CACHE_URL')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1 if shared_cache else 1))
+if workers > 1 and not shared_cache:
+    # Tokens, idempotência e os eventos da cozinha (SSE/long-poll) ficariam presos em cada
+    # processo: uma tela conectada a um worker não veria pedidos criados em outro
+    raise RuntimeError(
+        f'WEB_WORKERS={workers} exige SHARED_CACHE_URL (Redis) para cache e eventos da cozinha; '
+        'defina SHARED_CACHE_URL ou use WEB_WORKERS=1.'
+    )
+threads = int(os.environ.get('WEB_THREADS', 4))
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+keepalive = 5
+
+# Recicla workers periodicamente para conter vazamentos de memória
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+if mode == 'asgi':
+    wsgi_app = 'setup.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'setup.wsgi:application'
+    worker_class = 'gthread'
@@ -0,0 +1,85 @@
+"""
+Projeção dos pedidos em andamento (ActiveOrder).
+
+As telas da cozinha (?mode=kitchen, stream) e dos garçons (?mode=waiter) leem
+apenas esta tabela, que guarda o pedido já serializado e só tem as poucas
+linhas em queued/preparing/ready, não importa o tamanho do histórico.
+
+Toda escrita em Order que muda o status passa por aqui dentro da mesma transação:
+- criação do pedido na mesa: activate_order()
+- transições: sync_active_orders()
+- edição direta do pedido (PUT/PATCH): refresh_active_orders()
+Escritas fora desses caminhos (shell, admin, QuerySet.update) deixam a projeção
+desatualizada; `python manage.py rebuild_active_orders` a reconstrói.
+"""
+from django.db.models import Prefetch
+
+from restaurant.models import ACTIVE_STATUSES, ActiveOrder, Order, OrderItem
+from restaurant.serializers import OrderSerializer, requested_expansions, requested_fields
+
+
+def _projection(order, data):
+    return ActiveOrder(
+        order_id=order.pk,
+        status=order.status,
+        created_at=order.created_at,
+        table_number=order.table.number if order.table_id else None,
+        data=data,
+    )
+
+
+def activate_order(order, data):
+    """
+    Pedido recém-criado já em andamento. `data` é a representação do OrderSerializer
+    (a mesma da resposta), então a projeção não custa uma nova leitura.
+    """
+    if order.status in ACTIVE_STATUSES:
+        _projection(order, data).save(force_insert=True)
+
+
+def refresh_active_orders(order_ids):
+    """
+    Relê os pedidos e recria as projeções dos que estão em andamento.
+    """
+    ActiveOrder.objects.filter(order_id__in=order_ids).delete()
+    orders = Order.objects.filter(pk__in=order_ids, status__in=ACTIVE_STATUSES).select_related(
+        'table'
+    ).prefetch_related(Prefetch('items', queryset=OrderItem.objects.order_by('pk')))
+    ActiveOrder.objects.bulk_create([_projection(order, OrderSerializer(order).data) for order in orders])
+
+
+def sync_active_orders(order_ids, status):
+    """
+    Aplica uma transição de status já feita em Order (ver OrderQuerySet.transition).
+    """
+    if status not in ACTIVE_STATUSES:
+        ActiveOrder.objects.filter(order_id__in=order_ids).delete()
+        return
+
+    updated = ActiveOrder.objects.filter(order_id__in=order_ids).update(status=status)
+    if updated < len(order_ids):
+        # Pedidos que acabaram de entrar em andamento (ex.: pending -> queued)
+        existing = set(ActiveOrder.objects.filter(order_id__in=order_ids).values_list('order_id', flat=True))
+        refresh_active_orders([order_id for order_id in order_ids if order_id not in existing])
+
+
+def active_order_payloads(statuses, request=None):
+    """
+    Pedidos em andamento nos status pedidos, em ordem FIFO, no formato do OrderSerializer.
+    Aceita ?fields= e ?expand=table como a listagem comum.
+    """
+    fields = requested_fields(request)
+    expand_table = 'table' in requested_expansions(request)
+
+    payloads = []
+    rows = ActiveOrder.objects.filter(status__in=statuses).order_by('created_at').values_list(
+        'status', 'table_number', 'data'
+    )
+    for status, table_number, data in rows:
+        data['status'] = status # A coluna é a fonte da verdade; `data` guarda o status da criação
+        if expand_table and data.get('table') is not None:
+            data['table'] = {'id': data['table'], 'number': table_number}
+        if fields is not None:
+            data = {name: value for name, value in data.items() if name in fields}
+        payloads.append(data)
+    return payloads
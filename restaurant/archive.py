@@ -0,0 +1,99 @@
+"""
+Arquivamento de pedidos antigos.
+
+Pedidos concluídos ou cancelados há mais de ORDER_ARCHIVE_AFTER_DAYS dias saem
+de Order/OrderItem para ArchivedOrder/ArchivedOrderItem, em lotes pequenos e
+cada lote na sua própria transação (locks curtos). Assim a tabela quente, lida
+pela cozinha, pelos garçons e pelas transições, fica do tamanho do movimento
+recente. O histórico do cliente, o detalhe do pedido e a exportação leem as duas
+tabelas; os relatórios já leem só os resumos de vendas, que não são arquivados.
+"""
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from restaurant.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+# Status finais: o pedido não muda mais e pode sair da tabela quente
+ARCHIVABLE_STATUSES = ['completed', 'canceled']
+
+ORDER_COLUMNS = ['id', 'user_id', 'created_at', 'total_price', 'type', 'table_id', 'status', 'payment_confirmed']
+ITEM_COLUMNS = ['id', 'order_id', 'dish_id', 'quantity', 'price', 'observations']
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = getattr(settings, 'ORDER_ARCHIVE_AFTER_DAYS', 90)
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(cutoff, batch_size=500):
+    """
+    Move um lote de pedidos finalizados criados antes de `cutoff`. Retorna quantos foram movidos.
+    """
+    with transaction.atomic():
+        orders = list(
+            Order.objects.filter(status__in=ARCHIVABLE_STATUSES, created_at__lt=cutoff)
+            .order_by('pk').values(*ORDER_COLUMNS)[:batch_size]
+        )
+        if not orders:
+            return 0
+        ids = [order['id'] for order in orders]
+        items = list(OrderItem.objects.filter(order_id__in=ids).values(*ITEM_COLUMNS))
+
+        ArchivedOrder.objects.bulk_create([ArchivedOrder(**order) for order in orders])
+        ArchivedOrderItem.objects.bulk_create([ArchivedOrderItem(**item) for item in items])
+
+        OrderItem.objects.filter(order_id__in=ids).delete()
+        # Confere o status de novo: um pedido editado no meio do lote não é apagado
+        deleted = Order.objects.filter(pk__in=ids, status__in=ARCHIVABLE_STATUSES).delete()[1].get(Order._meta.label, 0)
+        if deleted != len(ids):
+            raise RuntimeError('Pedidos alterados durante o arquivamento; o lote foi desfeito.')
+    return len(ids)
+
+
+def _value(row, field):
+    # Instâncias dos modelos ou dicts de .values()
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+class OrderHistory:
+    """
+    Histórico de pedidos em Order e em ArchivedOrder como uma sequência só,
+    para a paginação por cursor: order_by() e filter() valem para as duas
+    tabelas e o fatiamento busca o necessário de cada uma e intercala em Python.
+    Aceita QuerySets de instâncias ou de .values() (com os campos da ordenação).
+    Todos os campos da ordenação precisam ter a mesma direção.
+    """
+
+    def __init__(self, *querysets, ordering=()):
+        self.querysets = querysets
+        self.ordering = ordering
+
+    def order_by(self, *ordering):
+        return OrderHistory(*(queryset.order_by(*ordering) for queryset in self.querysets), ordering=ordering)
+
+    def filter(self, *args, **kwargs):
+        return OrderHistory(*(queryset.filter(*args, **kwargs) for queryset in self.querysets), ordering=self.ordering)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError('OrderHistory aceita apenas fatias sem passo.')
+        start, stop = item.start or 0, item.stop
+
+        descending = {field.startswith('-') for field in self.ordering}
+        if len(descending) > 1:
+            raise ValueError('Todos os campos da ordenação precisam ter a mesma direção.')
+        fields = [field.lstrip('-') for field in self.ordering]
+
+        # Cada tabela contribui com no máximo `stop` linhas para a página
+        rows = [list(queryset[:stop]) for queryset in self.querysets]
+        merged = heapq.merge(
+            *rows,
+            key=lambda row: tuple(_value(row, field) for field in fields),
+            reverse=descending == {True},
+        )
+        return list(merged)[start:stop]
@@ -0,0 +1,88 @@
+"""
+Cache versionado do cardápio público.
+
+O cardápio inteiro é serializado uma única vez por versão e guardado no cache
+'menu' (LocMem por padrão, Redis quando SHARED_CACHE_URL estiver definido).
+A versão fica no banco (restaurant/versions.py), a mesma para todos os workers
+mesmo com LocMem: qualquer alteração em Dish a incrementa, o que invalida a
+entrada antiga de cada worker sem precisar apagá-la. Em regime estável, ler o
+cardápio faz uma única query (a da versão, por chave primária).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+
+from restaurant.versions import aget_version, bump_version, get_version
+from setup.metrics import record_cache
+
+MENU_VERSION = 'menu'
+MENU_ENTRY_KEY = 'menu:list:{version}'
+
+
+def get_menu_cache():
+    return caches[getattr(settings, 'MENU_CACHE_ALIAS', 'menu')]
+
+
+def _etag(data):
+    content = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return '"{}"'.format(hashlib.sha256(content.encode()).hexdigest()[:32])
+
+
+def get_menu_version():
+    return get_version(MENU_VERSION)
+
+
+def bump_menu_version():
+    bump_version(MENU_VERSION)
+
+
+def _menu_entry(version, items):
+    items = [dict(item) for item in items]
+    return {
+        'version': version,
+        'etag': _etag(items),
+        'items': items,
+        'by_id': {str(item['id']): (_etag(item), item) for item in items},
+    }
+
+
+def get_menu(build):
+    """
+    Retorna a entrada do cardápio para a versão atual:
+    {'version', 'etag', 'items', 'by_id': {id: (etag, item)}}.
+    `build` é chamado apenas quando a versão ainda não está em cache.
+    """
+    cache = get_menu_cache()
+    version = get_menu_version()
+    key = MENU_ENTRY_KEY.format(version=version)
+
+    menu = cache.get(key)
+    record_cache('menu', menu is not None)
+    if menu is None:
+        menu = _menu_entry(version, build())
+        cache.set(key, menu, timeout=getattr(settings, 'MENU_CACHE_TIMEOUT', 60 * 60 * 24))
+    return menu
+
+
+async def aget_menu_version():
+    return await aget_version(MENU_VERSION)
+
+
+async def aget_menu(abuild):
+    """
+    Versão assíncrona de get_menu, para views async. Mesmas chaves e mesmo formato:
+    as duas versões compartilham as entradas do cache. `abuild` é uma corrotina.
+    """
+    cache = get_menu_cache()
+    version = await aget_menu_version()
+    key = MENU_ENTRY_KEY.format(version=version)
+
+    menu = await cache.aget(key)
+    record_cache('menu', menu is not None)
+    if menu is None:
+        menu = _menu_entry(version, await abuild())
+        await cache.aset(key, menu, timeout=getattr(settings, 'MENU_CACHE_TIMEOUT', 60 * 60 * 24))
+    return menu
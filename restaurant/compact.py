@@ -0,0 +1,144 @@
+"""
+Representação compacta dos pedidos, para os aparelhos dos garçons em Wi-Fi fraco.
+
+Negociada pelo cabeçalho Accept (ou ?format=):
+- application/vnd.webmenu.compact+json (?format=compact)
+- application/msgpack (?format=msgpack): a mesma representação em MessagePack
+
+Na representação compacta:
+- `items` vira uma lista de tuplas [dish, quantity, observations]; observations
+  vazia é omitida ([dish, quantity]);
+- `status` vira um código inteiro (STATUS_CODES);
+- `created_at` vira um timestamp Unix em segundos.
+
+Os pedidos enviados nesses formatos (Content-Type) aceitam as mesmas tuplas e
+códigos, que são expandidos antes da validação pelo OrderSerializer.
+"""
+from datetime import datetime
+
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+COMPACT_MEDIA_TYPE = 'application/vnd.webmenu.compact+json'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+# Códigos fixos: não reordene, os aparelhos guardam esta tabela
+STATUS_CODES = {
+    'pending': 0,
+    'queued': 1,
+    'preparing': 2,
+    'ready': 3,
+    'completed': 4,
+    'canceled': 5,
+}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+ITEM_FIELDS = ('dish', 'quantity', 'observations')
+
+
+def _compact_item(item):
+    if not isinstance(item, dict):
+        return item
+    row = [item.get('dish'), item.get('quantity')]
+    if item.get('observations'):
+        row.append(item['observations'])
+    return row
+
+
+def _timestamp(value):
+    try:
+        # fromisoformat lê o formato do DRF (com 'Z' ou offset) bem mais rápido que parse_datetime
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        return value
+
+
+def compact(data):
+    """
+    Converte a representação comum (OrderSerializer, projeção ActiveOrder, transições)
+    para a compacta. Percorre listas e dicionários, então vale para páginas e lotes.
+    """
+    if isinstance(data, list):
+        return [compact(value) for value in data]
+    if not isinstance(data, dict):
+        return data
+
+    result = {}
+    for key, value in data.items():
+        if key == 'status' and isinstance(value, str) and value in STATUS_CODES:
+            value = STATUS_CODES[value]
+        elif key == 'items' and isinstance(value, list):
+            value = [_compact_item(item) for item in value]
+        elif key == 'created_at' and isinstance(value, str):
+            value = _timestamp(value)
+        elif isinstance(value, (list, dict)):
+            value = compact(value)
+        result[key] = value
+    return result
+
+
+def expand(data):
+    """
+    Caminho inverso para o corpo das requisições: tuplas de itens e códigos de status.
+    """
+    if not isinstance(data, dict):
+        return data
+
+    data = dict(data)
+    items = data.get('items')
+    if isinstance(items, list):
+        data['items'] = [
+            dict(zip(ITEM_FIELDS, item)) if isinstance(item, (list, tuple)) else item
+            for item in items
+        ]
+    code = data.get('status')
+    if isinstance(code, int) and not isinstance(code, bool):
+        data['status'] = STATUS_NAMES.get(code, code) # Código desconhecido: o serializer rejeita
+    return data
+
+
+class CompactJSONRenderer(JSONRenderer):
+    media_type = COMPACT_MEDIA_TYPE
+    format = 'compact'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(compact(data), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Decimal, datas, UUID, ...: mesma conversão do JSONRenderer
+        return msgpack.packb(compact(data), default=JSONEncoder().default)
+
+
+class CompactJSONParser(JSONParser):
+    media_type = COMPACT_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return expand(super().parse(stream, media_type, parser_context))
+
+
+class MessagePackParser(BaseParser):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            data = msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            # TypeError: chave de mapa não hashável (lista/mapa como chave)
+            raise ParseError(f'MessagePack inválido: {exc}')
+        return expand(data)
+
+
+COMPACT_RENDERER_CLASSES = [CompactJSONRenderer, MessagePackRenderer]
+COMPACT_PARSER_CLASSES = [CompactJSONParser, MessagePackParser]
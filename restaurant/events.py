@@ -0,0 +1,136 @@
+"""
+Canal de eventos da fila da cozinha.
+
+As views publicam eventos quando um pedido entra ou sai da fila e o endpoint
+de streaming (SSE) repassa esses eventos para as telas da cozinha.
+
+Brokers (KITCHEN_EVENTS_BROKER):
+- InProcessBroker: só dentro do processo, para um único worker.
+- RedisBroker (padrão com SHARED_CACHE_URL): pub/sub do Redis, entregando os
+  eventos de qualquer worker às telas conectadas em todos os outros. Depois de
+  uma queda da conexão com o Redis, os inscritos recebem 'resync' e recarregam
+  o estado do banco, já que eventos podem ter se perdido no meio.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessBroker:
+    """
+    Pub/sub em memória. Cada inscrito recebe uma asyncio.Queue própria;
+    publish pode ser chamado de qualquer thread (views síncronas).
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, event, data):
+        message = {'event': event, 'data': data}
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # Loop já encerrado: a conexão caiu sem cancelar a inscrição
+                self.unsubscribe(queue)
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    publish() vai para um canal do Redis; uma thread por processo escuta o canal e
+    repassa cada mensagem aos inscritos locais (inclusive as publicadas pelo próprio processo).
+    """
+    channel = 'kitchen:events'
+    reconnect_delay = 1 # Em segundos
+
+    def __init__(self, url=None):
+        super().__init__()
+        self._client = redis.Redis.from_url(url or settings.KITCHEN_EVENTS_URL)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, event, data):
+        self._client.publish(self.channel, json.dumps({'event': event, 'data': data}, cls=DjangoJSONEncoder))
+
+    def subscribe(self):
+        self._start()
+        return super().subscribe()
+
+    def _start(self):
+        # Thread criada sob demanda: com Gunicorn isso acontece depois do fork
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='kitchen-events', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        connected_before = False
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                if connected_before:
+                    # Eventos publicados durante a queda se perderam
+                    super().publish('resync', {})
+                connected_before = True
+                for message in pubsub.listen():
+                    self._deliver(message['data'])
+            except redis.RedisError:
+                logger.warning('Conexão com o Redis dos eventos da cozinha caiu; reconectando.', exc_info=True)
+                time.sleep(self.reconnect_delay)
+
+    def _deliver(self, raw):
+        message = json.loads(raw)
+        super().publish(message['event'], message['data'])
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, 'KITCHEN_EVENTS_BROKER', 'restaurant.events.InProcessBroker')
+    return import_string(path)()
+
+
+@receiver(setting_changed)
+def reset_broker(sender, setting, **kwargs):
+    if setting == 'KITCHEN_EVENTS_BROKER':
+        get_broker.cache_clear()
+
+
+def publish_order_event(event, data):
+    """
+    Publica o evento somente após o commit, para a cozinha nunca ver
+    um pedido que acabou sofrendo rollback.
+    """
+    transaction.on_commit(lambda: get_broker().publish(event, data))
+
+
+def format_sse(event, data):
+    """Formata uma mensagem no padrão text/event-stream."""
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
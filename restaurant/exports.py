@@ -0,0 +1,101 @@
+"""
+Exportação do histórico de pedidos em CSV ou NDJSON, em streaming.
+
+Os pedidos são lidos em lotes por chave (id > último id do lote anterior) e os
+itens de cada lote com uma query só. Cada lote vira um pedaço de texto e é
+descartado, então o uso de memória não depende do período exportado. Não usamos
+QuerySet.iterator() porque o driver do MySQL carrega o resultado inteiro no cliente.
+"""
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+
+EXPORT_FORMATS = ['csv', 'ndjson']
+
+ORDER_FIELDS = ['id', 'created_at', 'type', 'status', 'user_id', 'table_id', 'table_number', 'total_price', 'payment_confirmed']
+ITEM_FIELDS = ['id', 'dish_id', 'dish_name', 'quantity', 'price', 'observations']
+
+CSV_HEADER = [
+    'order_id', 'created_at', 'type', 'status', 'user_id', 'table_id', 'table_number', 'total_price',
+    'payment_confirmed', 'item_id', 'dish_id', 'dish_name', 'quantity', 'price', 'observations',
+]
+
+
+def iter_order_chunks(queryset, chunk_size=2000):
+    """
+    Gera listas de (pedido, itens) como dicionários, lote a lote.
+    Aceita Order ou ArchivedOrder; os itens vêm da relação 'items' do modelo.
+    """
+    item_model = queryset.model._meta.get_field('items').related_model
+    last_id = 0
+    while True:
+        orders = list(
+            queryset.filter(pk__gt=last_id).order_by('pk')
+            .values(
+                'id', 'created_at', 'type', 'status', 'user_id', 'table_id', 'total_price', 'payment_confirmed',
+                table_number=F('table__number'),
+            )[:chunk_size]
+        )
+        if not orders:
+            return
+
+        items_by_order = {}
+        items = item_model.objects.using(queryset.db).filter(order_id__in=[order['id'] for order in orders]).order_by('order_id', 'pk')
+        for item in items.values('order_id', 'id', 'dish_id', 'quantity', 'price', 'observations', dish_name=F('dish__name')):
+            items_by_order.setdefault(item.pop('order_id'), []).append(item)
+
+        yield [(order, items_by_order.get(order['id'], [])) for order in orders]
+        last_id = orders[-1]['id']
+
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+    return buffer.getvalue()
+
+
+def _order_csv_rows(order, items):
+    base = [order[field] for field in ORDER_FIELDS]
+    if not items:
+        return [base + [''] * len(ITEM_FIELDS)]
+    return [base + [item[field] for field in ITEM_FIELDS] for item in items]
+
+
+def export_orders(querysets, export_format='csv', chunk_size=2000):
+    """
+    Gera o arquivo exportado em pedaços de texto (um por lote).
+    `querysets` é uma lista de querysets de ArchivedOrder e/ou Order, exportados em sequência.
+    CSV: uma linha por item. NDJSON: um objeto JSON por pedido, com os itens aninhados.
+    """
+    if export_format == 'csv':
+        yield _csv_chunk([CSV_HEADER])
+
+    chunks = (chunk for queryset in querysets for chunk in iter_order_chunks(queryset, chunk_size))
+    for chunk in chunks:
+        if export_format == 'csv':
+            yield _csv_chunk(row for order, items in chunk for row in _order_csv_rows(order, items))
+        else:
+            yield ''.join(
+                json.dumps({**order, 'items': items}, cls=DjangoJSONEncoder) + '\n'
+                for order, items in chunk
+            )
+
+
+async def aiter_chunks(chunks):
+    """
+    No modo ASGI o Django acumularia um gerador síncrono inteiro antes de enviar;
+    aqui cada lote é lido numa thread e enviado assim que fica pronto.
+    """
+    next_chunk = sync_to_async(next)
+    while True:
+        chunk = await next_chunk(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
@@ -0,0 +1,171 @@
+"""
+Suporte ao cabeçalho Idempotency-Key na criação de pedidos.
+
+A primeira requisição com uma chave é executada e a resposta fica gravada por
+IDEMPOTENCY_KEY_TTL segundos; repetições (Wi-Fi instável, retry do frontend)
+recebem a resposta gravada sem validar nem inserir de novo. Duas requisições
+simultâneas com a mesma chave são serializadas: só uma executa, a outra recebe
+409 com Retry-After na hora (ou, com IDEMPOTENCY_WAIT_TIMEOUT, espera a resposta
+por no máximo IDEMPOTENCY_MAX_WAIT segundos, ocupando a thread enquanto isso).
+
+Backends (IDEMPOTENCY_STORE):
+- DatabaseIdempotencyStore (padrão): tabela IdempotencyKey, vale entre workers.
+  A resposta é gravada na mesma transação do pedido: se o processo morrer antes
+  do commit, não fica nem pedido nem resposta, e a chave volta a valer depois
+  de lock_timeout; se morrer depois, a repetição recebe a resposta gravada.
+- CacheIdempotencyStore: cache 'idempotency'; só serializa entre workers se o
+  cache for compartilhado (Redis). A resposta vai para o cache fora da transação:
+  uma queda entre o commit e a gravação permite um pedido duplicado.
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import IntegrityError, models, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from restaurant.models import IdempotencyKey
+
+# Teto da espera opcional por uma duplicata em andamento (em segundos)
+IDEMPOTENCY_MAX_WAIT = 2
+
+
+def _ttl():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+
+class DatabaseIdempotencyStore:
+    def get(self, key):
+        record = IdempotencyKey.objects.filter(
+            key=key, status_code__isnull=False, created_at__gte=timezone.now() - timedelta(seconds=_ttl())
+        ).values('fingerprint', 'status_code', 'response').first()
+        if record is None:
+            return None
+        return {'fingerprint': record['fingerprint'], 'status': record['status_code'], 'data': record['response']}
+
+    lock_timeout = 30 # Em segundos: reserva sem resposta depois disso é de um worker que morreu
+
+    def acquire(self, key, fingerprint):
+        now = timezone.now()
+        IdempotencyKey.objects.filter(key=key).filter(
+            models.Q(created_at__lt=now - timedelta(seconds=_ttl()))
+            | models.Q(status_code__isnull=True, created_at__lt=now - timedelta(seconds=self.lock_timeout))
+        ).delete()
+
+        # A UNIQUE da coluna key garante que só uma requisição reserva a chave
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(key=key, fingerprint=fingerprint)
+        except IntegrityError:
+            return False
+        return True
+
+    def save(self, key, record):
+        IdempotencyKey.objects.filter(key=key).update(status_code=record['status'], response=record['data'])
+
+    def release(self, key):
+        # Falhou sem gravar resposta: libera a chave para uma nova tentativa
+        IdempotencyKey.objects.filter(key=key, status_code__isnull=True).delete()
+
+    def purge(self):
+        """Remove as chaves expiradas (comando purge_idempotency_keys)."""
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=_ttl())).delete()
+        return deleted
+
+
+class CacheIdempotencyStore:
+    lock_timeout = 30 # Em segundos: evita chave presa se o worker morrer no meio
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', 'idempotency')]
+
+    def get(self, key):
+        return self.cache.get(f'idempotency:{key}')
+
+    def acquire(self, key, fingerprint):
+        return self.cache.add(f'idempotency:lock:{key}', fingerprint, timeout=self.lock_timeout)
+
+    def save(self, key, record):
+        self.cache.set(f'idempotency:{key}', record, timeout=_ttl())
+
+    def release(self, key):
+        self.cache.delete(f'idempotency:lock:{key}')
+
+
+@lru_cache(maxsize=None)
+def get_idempotency_store():
+    path = getattr(settings, 'IDEMPOTENCY_STORE', 'restaurant.idempotency.DatabaseIdempotencyStore')
+    return import_string(path)()
+
+
+@receiver(setting_changed)
+def reset_idempotency_store(sender, setting, **kwargs):
+    if setting in ('IDEMPOTENCY_STORE', 'IDEMPOTENCY_CACHE_ALIAS'):
+        get_idempotency_store.cache_clear()
+
+
+class IdempotentCreateMixin:
+    """
+    Mixin para ViewSets: torna o create() idempotente quando o cliente envia Idempotency-Key.
+    """
+
+    def _replay(self, record, fingerprint):
+        if record['fingerprint'] != fingerprint:
+            return Response(
+                {'detail': 'Idempotency-Key já usada com outro conteúdo.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(record['data'], status=record['status'], headers={'Idempotent-Replayed': 'true'})
+
+    def create(self, request, *args, **kwargs):
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if not idempotency_key:
+            return super().create(request, *args, **kwargs) # type: ignore
+
+        # Chave por usuário: a chave de um cliente não devolve o pedido de outro
+        user_id = request.user.pk if request.user.is_authenticated else 'anon'
+        key = hashlib.sha256(f'{self.basename}:{user_id}:{idempotency_key}'.encode()).hexdigest() # type: ignore
+        fingerprint = hashlib.sha256(json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder).encode()).hexdigest()
+        store = get_idempotency_store()
+
+        record = store.get(key)
+        if record is not None:
+            return self._replay(record, fingerprint)
+
+        if not store.acquire(key, fingerprint):
+            # Outra requisição com a mesma chave está em andamento. Por padrão responde na
+            # hora e o cliente repete depois; a espera é opcional e curta, pois prende a thread
+            wait = min(getattr(settings, 'IDEMPOTENCY_WAIT_TIMEOUT', 0), IDEMPOTENCY_MAX_WAIT)
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                record = store.get(key)
+                if record is not None:
+                    return self._replay(record, fingerprint)
+            return Response(
+                {'detail': 'Requisição com esta Idempotency-Key ainda em andamento.'},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Retry-After': '1'},
+            )
+
+        try:
+            # Pedido e resposta gravada confirmados juntos (DatabaseIdempotencyStore)
+            with transaction.atomic():
+                response = super().create(request, *args, **kwargs) # type: ignore
+                data = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+                store.save(key, {'fingerprint': fingerprint, 'status': response.status_code, 'data': data})
+        except Exception:
+            # Erro de validação ou falha: nada foi inserido, a chave pode ser usada de novo
+            store.release(key)
+            raise
+        return response
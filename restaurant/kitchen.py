@@ -0,0 +1,125 @@
+"""
+Quadro consolidado da cozinha: "12x Hamburguer, 7x Pizza".
+
+O quadro é carregado com uma única query agrupada sobre os itens dos pedidos
+em queued/preparing e fica em memória junto com a versão 'kitchen' (CacheVersion)
+com que foi montado. Toda escrita que muda a fila incrementa essa versão na
+própria transação (bump_kitchen_version); cada leitura confere a versão no banco
+(uma query por chave primária) e recarrega o quadro se outro worker, ou o
+próprio, mudou a fila. Assim o quadro nunca fica atrás do último commit.
+"""
+import threading
+from collections import defaultdict
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from restaurant.models import KITCHEN_STATUSES, ORDER_TRANSITIONS, OrderItem
+from restaurant.versions import bump_version, get_version
+
+KITCHEN_VERSION = 'kitchen'
+
+
+class KitchenBoard:
+    def __init__(self):
+        # {order_id: {'created_at', 'table_id', 'table_number', 'items': {dish_id: [nome, quantidade]}}}
+        self._orders = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._orders = None
+
+    def _load(self):
+        rows = OrderItem.objects.filter(
+            order__status__in=KITCHEN_STATUSES
+        ).values(
+            'order_id', 'order__created_at', 'order__table_id', 'order__table__number', 'dish_id', 'dish__name'
+        ).annotate(quantity=Sum('quantity')).order_by()
+
+        orders = {}
+        for row in rows:
+            entry = orders.setdefault(row['order_id'], {
+                'created_at': row['order__created_at'],
+                'table_id': row['order__table_id'],
+                'table_number': row['order__table__number'],
+                'items': {},
+            })
+            entry['items'][row['dish_id']] = [row['dish__name'], row['quantity']]
+        return orders
+
+    def summary(self):
+        """
+        Totais por prato (com o pedido mais antigo esperando) e agrupados por mesa.
+        """
+        version = get_version(KITCHEN_VERSION)
+        with self._lock:
+            if self._orders is None or self._version != version:
+                self._orders = self._load()
+                self._version = version
+            orders = list(self._orders.values())
+
+        now = timezone.now()
+        dishes = {}
+        tables = {}
+        for entry in orders:
+            table = tables.setdefault(entry['table_id'], {
+                'table': entry['table_id'],
+                'number': entry['table_number'], # None = pedido para viagem
+                'orders': 0,
+                'oldest_created_at': entry['created_at'],
+                'dishes': defaultdict(int),
+            })
+            table['orders'] += 1
+            table['oldest_created_at'] = min(table['oldest_created_at'], entry['created_at'])
+
+            for dish_id, (name, quantity) in entry['items'].items():
+                dish = dishes.setdefault(dish_id, {
+                    'dish': dish_id,
+                    'name': name,
+                    'quantity': 0,
+                    'orders': 0,
+                    'oldest_created_at': entry['created_at'],
+                })
+                dish['quantity'] += quantity
+                dish['orders'] += 1
+                dish['oldest_created_at'] = min(dish['oldest_created_at'], entry['created_at'])
+                table['dishes'][dish_id] += quantity
+
+        for group in (*dishes.values(), *tables.values()):
+            group['oldest_wait_seconds'] = int((now - group['oldest_created_at']).total_seconds())
+        for table in tables.values():
+            table['dishes'] = [
+                {'dish': dish_id, 'name': dishes[dish_id]['name'], 'quantity': quantity}
+                for dish_id, quantity in table['dishes'].items()
+            ]
+
+        # Quem espera há mais tempo aparece primeiro (FIFO)
+        return {
+            'dishes': sorted(dishes.values(), key=lambda d: d['oldest_created_at']),
+            'tables': sorted(tables.values(), key=lambda t: t['oldest_created_at']),
+        }
+
+
+_board = KitchenBoard()
+
+
+def get_kitchen_board():
+    return _board
+
+
+def changes_kitchen(status_to):
+    """
+    A transição para `status_to` faz um pedido entrar ou sair da fila da cozinha?
+    ('preparing' continua na fila; 'completed' só parte de 'ready', que já saiu.)
+    """
+    return any((source in KITCHEN_STATUSES) != (status_to in KITCHEN_STATUSES) for source in ORDER_TRANSITIONS[status_to])
+
+
+def bump_kitchen_version():
+    """
+    Chame dentro da transação da escrita que muda a fila: o quadro de todos os
+    workers é recarregado na próxima leitura depois do commit.
+    """
+    bump_version(KITCHEN_VERSION)
@@ -0,0 +1,24 @@
+"""
+Funções de apoio compartilhadas pelos comandos de benchmark e carga.
+Módulos começando com '_' não são registrados como comandos pelo Django.
+"""
+import math
+
+
+def percentile(sorted_values, pct):
+    """Percentil pelo método do posto mais próximo; espera a lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms):
+    values = sorted(latencies_ms)
+    return {
+        'count': len(values),
+        'p50_ms': percentile(values, 50),
+        'p95_ms': percentile(values, 95),
+        'p99_ms': percentile(values, 99),
+        'max_ms': values[-1] if values else 0.0,
+    }
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from restaurant.archive import archive_batch, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        'Move pedidos concluídos/cancelados mais antigos que ORDER_ARCHIVE_AFTER_DAYS para as tabelas de arquivo, '
+        'em lotes curtos (uma transação por lote). Com --every roda como job contínuo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Idade mínima em dias (padrão: ORDER_ARCHIVE_AFTER_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Segundos entre lotes, para não disputar o banco com o tráfego.')
+        parser.add_argument('--every', type=float,
+                            help='Repete a cada N segundos (job agendado, ex.: serviço no docker-compose).')
+
+    def handle(self, *args, **options):
+        while True:
+            self._archive(options)
+            if not options['every']:
+                return
+            time.sleep(options['every'])
+
+    def _archive(self, options):
+        cutoff = archive_cutoff(options['days'])
+        total = 0
+        while True:
+            moved = archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'{total} pedidos arquivados.')
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'{total} pedido(s) anteriores a {cutoff:%Y-%m-%d %H:%M} arquivado(s).'))
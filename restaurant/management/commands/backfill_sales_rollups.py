@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from restaurant.models import ArchivedOrder, DishSalesRollup, Order, OrderSalesRollup
+from restaurant.reports import insert_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói as tabelas de resumo de vendas a partir do histórico de pedidos concluídos '
+        '(inclusive os arquivados), '
+        'lendo em lotes por ID para manter o uso de memória constante. '
+        'Pedidos concluídos durante a execução podem ser contados duas vezes: rode fora do horário de pico.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        with transaction.atomic():
+            OrderSalesRollup.objects.all().delete()
+            DishSalesRollup.objects.all().delete()
+
+        total = 0
+        # Pedidos arquivados (restaurant/archive.py) e os da tabela quente
+        for model in (ArchivedOrder, Order):
+            last_id = 0
+            while True:
+                # Paginação por chave (id > último), sem OFFSET
+                ids = list(
+                    model.objects.filter(status='completed', pk__gt=last_id)
+                    .order_by('pk').values_list('pk', flat=True)[:chunk_size]
+                )
+                if not ids:
+                    break
+
+                with transaction.atomic():
+                    insert_rollups(model.objects.filter(status='completed', pk__gt=last_id, pk__lte=ids[-1]))
+
+                last_id = ids[-1]
+                total += len(ids)
+                self.stdout.write(f'{total} pedidos processados.')
+
+        self.stdout.write(self.style.SUCCESS(f'Resumos reconstruídos a partir de {total} pedidos.'))
@@ -0,0 +1,169 @@
+import json
+import random
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from restaurant.management.commands._stats import summarize
+from restaurant.models import Dish, Order, Table
+from users.models import User
+
+# Mistura de tráfego de um horário de almoço (pesos relativos)
+LUNCH_RUSH_MIX = {
+    'menu': 50,
+    'order-create': 20,
+    'kitchen-poll': 20,
+    'mark-ready': 5,
+    'mark-completed': 5,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark em processo da API: reproduz o tráfego de um almoço (cardápio, pedidos na mesa, '
+        'cozinha e transições) e reporta latências, número de queries e tempo de banco por endpoint. '
+        'Compara com um arquivo de baseline e falha em caso de regressão. Grava no banco configurado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-orders', type=int, default=0,
+                            help='Popula o banco (seed_restaurant) com N pedidos antes de medir.')
+        parser.add_argument('--requests', type=int, default=2000, help='Total de requisições reproduzidas.')
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmark_baseline.json'))
+        parser.add_argument('--update-baseline', action='store_true', help='Grava os resultados como nova baseline.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Piora aceitável do p95 em relação à baseline (0.25 = 25%%).')
+
+    def handle(self, *args, **options):
+        baseline_path = Path(options['baseline'])
+        if not options['update_baseline'] and not baseline_path.exists():
+            # Sem baseline não há com o que comparar: falhar aqui evita um "passou" que não mediu nada
+            raise CommandError(f'Baseline {baseline_path} não encontrada. Gere com --update-baseline.')
+
+        if options['seed_orders']:
+            call_command('seed_restaurant', orders=options['seed_orders'], stdout=self.stdout)
+
+        self.rng = random.Random(options['random_seed'])
+        self._prepare()
+
+        samples = defaultdict(list)
+        endpoints = list(LUNCH_RUSH_MIX)
+        weights = list(LUNCH_RUSH_MIX.values())
+        for _ in range(options['requests']):
+            endpoint = self.rng.choices(endpoints, weights)[0]
+            sample = self._request(endpoint)
+            if sample is not None:
+                samples[endpoint].append(sample)
+
+        report = self._report(samples)
+        if options['update_baseline']:
+            baseline_path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline gravada em {baseline_path}.'))
+        else:
+            self._compare(report, json.loads(baseline_path.read_text()), options['tolerance'])
+
+    def _prepare(self):
+        self.table = Table.objects.exclude(validation_code=None).first()
+        self.dish_ids = list(Dish.objects.values_list('id', flat=True)[:500])
+        if self.table is None or not self.dish_ids:
+            raise CommandError('Nenhuma mesa com código ou prato cadastrado. Use --seed-orders ou seed_restaurant.')
+
+        staff, _ = User.objects.get_or_create(
+            username='bench-staff', defaults={'email': 'bench-staff@example.com', 'type': 'staff', 'is_staff': True}
+        )
+        self.customer = APIClient()
+        self.staff = APIClient()
+        self.staff.force_authenticate(user=staff)
+
+        # Pedidos que as transições vão consumir
+        self.queued = deque(Order.objects.filter(status='queued').values_list('id', flat=True)[:1000])
+        self.ready = deque(Order.objects.filter(status='ready').values_list('id', flat=True)[:1000])
+
+    def _call(self, endpoint):
+        if endpoint == 'menu':
+            return self.customer.get(reverse('dish-list'))
+
+        if endpoint == 'order-create':
+            payload = {
+                'type': 'dine-in',
+                'table': self.table.pk, # type: ignore
+                'validation_code': self.table.validation_code, # type: ignore
+                'items': [
+                    {'dish': dish_id, 'quantity': self.rng.randint(1, 3)}
+                    for dish_id in self.rng.sample(self.dish_ids, k=min(len(self.dish_ids), self.rng.randint(1, 20)))
+                ],
+            }
+            response = self.customer.post(reverse('order-list'), payload, format='json')
+            if response.status_code == 201:
+                self.queued.append(response.data['id']) # type: ignore
+            return response
+
+        if endpoint == 'kitchen-poll':
+            return self.staff.get(reverse('order-list'), {'mode': 'kitchen'})
+
+        if endpoint == 'mark-ready':
+            if not self.queued:
+                return None
+            order_id = self.queued.popleft()
+            response = self.staff.patch(reverse('order-mark-ready', args=[order_id]))
+            self.ready.append(order_id)
+            return response
+
+        if not self.ready:
+            return None
+        return self.staff.patch(reverse('order-mark-completed', args=[self.ready.popleft()]))
+
+    def _request(self, endpoint):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = self._call(endpoint)
+            elapsed = (time.perf_counter() - start) * 1000
+
+        if response is None:
+            return None
+        if response.status_code >= 400:
+            raise CommandError(f'{endpoint} respondeu {response.status_code}: {getattr(response, "data", "")}')
+        return {
+            'latency_ms': elapsed,
+            'queries': len(queries.captured_queries),
+            'db_ms': sum(float(query['time']) for query in queries.captured_queries) * 1000,
+        }
+
+    def _report(self, samples):
+        report = {}
+        header = f'{"endpoint":<16}{"n":>6}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"queries":>10}{"db ms":>10}'
+        self.stdout.write(header)
+        for endpoint, values in samples.items():
+            stats = summarize([value['latency_ms'] for value in values])
+            stats['queries'] = max(value['queries'] for value in values)
+            stats['db_ms'] = sum(value['db_ms'] for value in values) / len(values)
+            report[endpoint] = stats
+            self.stdout.write(
+                f'{endpoint:<16}{stats["count"]:>6}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}'
+                f'{stats["p99_ms"]:>10.2f}{stats["queries"]:>10}{stats["db_ms"]:>10.2f}'
+            )
+        return report
+
+    def _compare(self, report, baseline, tolerance):
+        regressions = []
+        for endpoint, stats in report.items():
+            expected = baseline.get(endpoint)
+            if expected is None:
+                continue
+            if stats['queries'] > expected['queries']:
+                regressions.append(f'{endpoint}: {stats["queries"]} queries (baseline {expected["queries"]})')
+            if stats['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+                regressions.append(f'{endpoint}: p95 {stats["p95_ms"]:.2f} ms (baseline {expected["p95_ms"]:.2f} ms)')
+
+        if regressions:
+            raise CommandError('Regressões em relação à baseline:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Sem regressões em relação à baseline.'))
@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from restaurant.models import ACTIVE_ORDERS_INDEX, KITCHEN_STATUSES, Order
+
+
+def benchmark_queries():
+    """
+    Consultas quentes do OrderViewSet que os índices de Order atendem.
+    """
+    sample = Order.objects.exclude(user=None).exclude(table=None).values('user_id', 'table_id').first() \
+        or {'user_id': 0, 'table_id': 0}
+    return {
+        'kitchen_fifo': Order.objects.filter(status__in=KITCHEN_STATUSES).order_by('created_at'),
+        'user_history': Order.objects.filter(user_id=sample['user_id'])[:50],
+        'table_open_orders': Order.objects.filter(table_id=sample['table_id'], status__in=['queued', 'preparing', 'ready']),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara plano de execução e tempo das consultas de pedidos com e sem os índices de Order. '
+        'Remove e recria os índices: use apenas em um banco de benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-orders', type=int, default=0,
+                            help='Popula o banco (seed_restaurant) com N pedidos antes de medir.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['seed_orders']:
+            call_command('seed_restaurant', orders=options['seed_orders'], stdout=self.stdout)
+
+        self.stdout.write(f'Pedidos na tabela: {Order.objects.count()}')
+        indexes = list(Order._meta.indexes)
+        if connection.features.supports_partial_indexes:
+            indexes.append(ACTIVE_ORDERS_INDEX)
+
+        after = self._measure(options['repeat'])
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(Order, index)
+        try:
+            before = self._measure(options['repeat'])
+        finally:
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(Order, index)
+
+        for name in after:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {name}'))
+            for label, result in (('sem índices', before[name]), ('com índices', after[name])):
+                self.stdout.write(f'-- {label}: mediana {result["median_ms"]:.2f} ms, p95 {result["p95_ms"]:.2f} ms')
+                self.stdout.write(result['plan'])
+
+    def _measure(self, repeat):
+        results = {}
+        for name, queryset in benchmark_queries().items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all()) # .all() descarta o cache de resultados do QuerySet
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results[name] = {
+                'plan': queryset.explain(),
+                'median_ms': statistics.median(timings),
+                'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            }
+        return results
@@ -0,0 +1,63 @@
+import gzip
+import statistics
+import time
+
+import brotli
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from restaurant.compact import CompactJSONRenderer, MessagePackRenderer
+from restaurant.models import Order, OrderItem
+from restaurant.serializers import OrderSerializer
+from setup.compression import brotli_quality
+
+RENDERERS = {
+    'json': JSONRenderer(),
+    'compact': CompactJSONRenderer(),
+    'msgpack': MessagePackRenderer(),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara tamanho e tempo de renderização de uma página de pedidos em JSON, JSON compacto '
+        'e MessagePack, sem compressão, com gzip e com brotli.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-orders', type=int, default=0,
+                            help='Popula o banco (seed_restaurant) com N pedidos antes de medir.')
+        parser.add_argument('--orders', type=int, default=50, help='Pedidos na página (padrão: uma página do histórico).')
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if options['seed_orders']:
+            call_command('seed_restaurant', orders=options['seed_orders'], stdout=self.stdout)
+
+        orders = list(
+            Order.objects.order_by('-created_at', '-id').prefetch_related(
+                Prefetch('items', queryset=OrderItem.objects.order_by('pk'))
+            )[:options['orders']]
+        )
+        if not orders:
+            raise CommandError('Nenhum pedido no banco. Use --seed-orders ou seed_restaurant.')
+        data = OrderSerializer(orders, many=True).data
+        items = sum(len(order['items']) for order in data)
+        self.stdout.write(f'{len(data)} pedidos, {items} itens')
+
+        header = f'{"formato":<10}{"bytes":>10}{"gzip":>10}{"brotli":>10}{"render µs":>12}{"µs/pedido":>12}'
+        self.stdout.write(header)
+        for name, renderer in RENDERERS.items():
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                content = renderer.render(data)
+                timings.append((time.perf_counter() - start) * 1_000_000)
+            median = statistics.median(timings)
+            self.stdout.write(
+                f'{name:<10}{len(content):>10}{len(gzip.compress(content, compresslevel=6)):>10}'
+                f'{len(brotli.compress(content, quality=brotli_quality())):>10}'
+                f'{median:>12.1f}{median / len(data):>12.2f}'
+            )
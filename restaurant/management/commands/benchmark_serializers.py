@@ -0,0 +1,69 @@
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+
+from restaurant.models import Dish, Order, OrderItem, Table
+from restaurant.readers import RowReader
+from restaurant.serializers import DishSerializer, OrderSerializer, TableSerializer
+
+
+def _median_us(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        'Microbenchmark da serialização de leitura: ModelSerializer do DRF contra o RowReader '
+        '(restaurant/readers.py), em µs por objeto, só a serialização e com as queries.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-orders', type=int, default=0,
+                            help='Popula o banco (seed_restaurant) com N pedidos antes de medir.')
+        parser.add_argument('--objects', type=int, default=200, help='Objetos por lista.')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options['seed_orders']:
+            call_command('seed_restaurant', orders=options['seed_orders'], stdout=self.stdout)
+
+        limit = options['objects']
+        cases = {
+            'Order': (
+                OrderSerializer, Order,
+                lambda: Order.objects.order_by('-created_at', '-id')[:limit],
+                lambda queryset: queryset.prefetch_related(Prefetch('items', queryset=OrderItem.objects.order_by('pk'))),
+            ),
+            'Dish': (DishSerializer, Dish, lambda: Dish.objects.order_by('pk')[:limit], lambda queryset: queryset),
+            'Table': (TableSerializer, Table, lambda: Table.objects.order_by('pk')[:limit], lambda queryset: queryset),
+        }
+
+        header = f'{"modelo":<8}{"n":>6}{"DRF µs/obj":>14}{"RowReader":>12}{"DRF+SQL":>12}{"Reader+SQL":>12}'
+        self.stdout.write(header)
+        for name, (serializer_class, model, base, prefetch) in cases.items():
+            instances = list(prefetch(base()))
+            if not instances:
+                raise CommandError(f'Nenhum {name} no banco. Use --seed-orders ou seed_restaurant.')
+            reader = RowReader(serializer_class)
+            rows = list(reader.values(base()))
+            nested = reader.fetch_nested(model, rows)
+            count = len(instances)
+            if reader.build(rows, nested) != serializer_class(instances, many=True).data:
+                raise CommandError(f'{name}: RowReader e {serializer_class.__name__} produziram saídas diferentes.')
+
+            drf = _median_us(lambda: serializer_class(instances, many=True).data, options['repeat'])
+            fast = _median_us(lambda: reader.build(rows, nested), options['repeat'])
+            drf_sql = _median_us(lambda: serializer_class(list(prefetch(base())), many=True).data, options['repeat'])
+            fast_sql = _median_us(lambda: reader.serialize(list(reader.values(base())), model), options['repeat'])
+            self.stdout.write(
+                f'{name:<8}{count:>6}{drf / count:>14.2f}{fast / count:>12.2f}'
+                f'{drf_sql / count:>12.2f}{fast_sql / count:>12.2f}'
+            )
@@ -0,0 +1,58 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from restaurant.exports import EXPORT_FORMATS, export_orders
+from restaurant.models import ArchivedOrder, Order
+
+
+class Command(BaseCommand):
+    help = 'Exporta pedidos e itens em CSV ou NDJSON, em lotes, com uso de memória constante.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help="Arquivo de saída ('-' para a saída padrão).")
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--start', help='Data inicial (AAAA-MM-DD), inclusiva.')
+        parser.add_argument('--end', help='Data final (AAAA-MM-DD), inclusiva.')
+        parser.add_argument('--status', help='Exporta apenas pedidos neste status.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help="Banco de onde ler (ex.: 'replica' para não pesar no principal).",
+        )
+
+    def _parse_day(self, value):
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise CommandError(f'Data inválida: {value}. Use AAAA-MM-DD.')
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options['start']:
+            filters['created_at__gte'] = self._parse_day(options['start'])
+        if options['end']:
+            filters['created_at__lt'] = self._parse_day(options['end']) + timedelta(days=1)
+        if options['status']:
+            filters['status'] = options['status']
+
+        # Pedidos arquivados (mais antigos) e depois os da tabela quente
+        querysets = [
+            ArchivedOrder.objects.using(options['database']).filter(**filters),
+            Order.objects.using(options['database']).filter(**filters),
+        ]
+        chunks = export_orders(querysets, options['format'], options['chunk_size'])
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for chunk in chunks:
+                output.write(chunk)
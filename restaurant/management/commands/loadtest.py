@@ -0,0 +1,128 @@
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant.management.commands._stats import summarize
+from restaurant.models import Dish, Order, Table
+
+SCENARIOS = ['menu', 'order-create']
+# Pares síncrono (DRF) x assíncrono; os de pedido exigem --token de um funcionário
+ASYNC_SCENARIOS = ['menu-async', 'order-status', 'order-status-async', 'order-wait']
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de carga HTTP contra um servidor em execução (runserver, gunicorn wsgi/asgi). '
+        'Mede req/s e latências p50/p99 do cardápio e da criação de pedidos. '
+        'Os cenários async comparam as views assíncronas com as do DRF (rode sob ASGI) e '
+        'order-wait mantém long-polls abertos; rode-o junto com outro cenário para ver se eles ocupam workers. '
+        'Use seed_restaurant antes para ter pratos e mesas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000')
+        parser.add_argument('--scenario', choices=SCENARIOS + ASYNC_SCENARIOS + ['all', 'async'], default='all')
+        parser.add_argument('--token', help='Token de um funcionário, para os cenários de status do pedido.')
+        parser.add_argument('--concurrency', type=int, default=16, help='Clientes simultâneos (threads).')
+        parser.add_argument('--duration', type=float, default=10.0, help='Segundos por cenário.')
+        parser.add_argument('--timeout', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        target = urlsplit(options['url'])
+        if target.scheme != 'http':
+            raise CommandError('Apenas URLs http:// são suportadas.')
+
+        scenarios = {'all': SCENARIOS, 'async': ASYNC_SCENARIOS}.get(options['scenario'], [options['scenario']])
+        for name in scenarios:
+            make_request = self._make_request(name, options)
+            elapsed, results = self._run(target, make_request, options)
+
+            latencies = [latency for latency, _ in results]
+            errors = sum(1 for _, ok in results if not ok)
+            stats = summarize(latencies)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {name}'))
+            self.stdout.write(
+                f'{stats["count"]} requisições em {elapsed:.1f}s: {stats["count"] / elapsed:.1f} req/s, '
+                f'p50 {stats["p50_ms"]:.1f} ms, p99 {stats["p99_ms"]:.1f} ms, max {stats["max_ms"]:.1f} ms, '
+                f'{errors} erros'
+            )
+
+    def _make_request(self, name, options):
+        if name == 'menu':
+            return lambda: ('GET', '/api/dishes/', None)
+        if name == 'menu-async':
+            return lambda: ('GET', '/api/menu/', None)
+        if name == 'order-create':
+            return self._order_create_request()
+
+        if not options['token']:
+            raise CommandError(f'O cenário {name} exige --token de um funcionário.')
+        order_ids = list(Order.objects.order_by('-pk').values_list('pk', flat=True)[:500])
+        if not order_ids:
+            raise CommandError('Nenhum pedido cadastrado. Rode seed_restaurant antes.')
+
+        paths = {
+            'order-status': '/api/orders/{}/?fields=id,status',
+            'order-status-async': '/api/orders/{}/status/',
+            # Espera por uma mudança que não vem: cada requisição fica parada até o timeout
+            'order-wait': '/api/orders/{}/wait/?timeout=5',
+        }
+        path = paths[name]
+        return lambda: ('GET', path.format(random.choice(order_ids)), None)
+
+    def _order_create_request(self):
+        table = Table.objects.exclude(validation_code=None).first()
+        dish_ids = list(Dish.objects.values_list('id', flat=True)[:500])
+        if table is None or not dish_ids:
+            raise CommandError('Nenhuma mesa com código ou prato cadastrado. Rode seed_restaurant antes.')
+
+        def make_request():
+            payload = {
+                'type': 'dine-in',
+                'table': table.pk,
+                'validation_code': table.validation_code,
+                'items': [
+                    {'dish': dish_id, 'quantity': random.randint(1, 3)}
+                    for dish_id in random.sample(dish_ids, k=min(len(dish_ids), random.randint(1, 4)))
+                ],
+            }
+            return 'POST', '/api/orders/', json.dumps(payload)
+
+        return make_request
+
+    def _run(self, target, make_request, options):
+        results = []
+        deadline = time.perf_counter() + options['duration']
+
+        def worker():
+            # Uma conexão keep-alive por cliente, como um navegador faria
+            connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=options['timeout'])
+            while time.perf_counter() < deadline:
+                method, path, body = make_request()
+                headers = {'Content-Type': 'application/json'} if body else {}
+                if options['token']:
+                    headers['Authorization'] = f'Token {options["token"]}'
+                start = time.perf_counter()
+                try:
+                    connection.request(method, path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    ok = response.status < 400
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    ok = False
+                results.append(((time.perf_counter() - start) * 1000, ok))
+            connection.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, results
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from restaurant.idempotency import DatabaseIdempotencyStore
+
+
+class Command(BaseCommand):
+    help = 'Remove as chaves de idempotência expiradas (IDEMPOTENCY_KEY_TTL). Agende para rodar periodicamente.'
+
+    def handle(self, *args, **options):
+        deleted = DatabaseIdempotencyStore().purge()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} chave(s) expirada(s) removida(s).'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from restaurant.active import refresh_active_orders
+from restaurant.kitchen import bump_kitchen_version
+from restaurant.models import ACTIVE_STATUSES, ActiveOrder, Order
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói a projeção dos pedidos em andamento (ActiveOrder) a partir de Order. '
+        'Use após escritas fora da API (shell, admin, QuerySet.update) ou para recuperar a tabela.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        # Uma transação só: as telas nunca veem a projeção pela metade
+        with transaction.atomic():
+            ActiveOrder.objects.all().delete()
+            ids = list(Order.objects.filter(status__in=ACTIVE_STATUSES).values_list('pk', flat=True))
+            for start in range(0, len(ids), chunk_size):
+                refresh_active_orders(ids[start:start + chunk_size])
+            # O quadro da cozinha (restaurant/kitchen.py) também não viu essas escritas
+            bump_kitchen_version()
+
+        self.stdout.write(self.style.SUCCESS(f'{len(ids)} pedido(s) em andamento projetado(s).'))
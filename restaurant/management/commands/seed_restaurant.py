@@ -0,0 +1,133 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from restaurant.cache import bump_menu_version
+from restaurant.models import Dish, Order, OrderItem, Table
+from restaurant.tables import bump_tables_version
+from users.models import User
+
+
+@contextmanager
+def explicit_created_at():
+    """
+    auto_now_add sobrescreve created_at no bulk_create; desligamos
+    temporariamente para espalhar os pedidos ao longo do histórico.
+    """
+    field = Order._meta.get_field('created_at')
+    field.auto_now_add = False # type: ignore
+    try:
+        yield
+    finally:
+        field.auto_now_add = True # type: ignore
+
+
+class Command(BaseCommand):
+    help = 'Popula o banco com dados sintéticos (pratos, mesas, clientes e pedidos) para benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dishes', type=int, default=200)
+        parser.add_argument('--tables', type=int, default=50)
+        parser.add_argument('--customers', type=int, default=200)
+        parser.add_argument('--orders', type=int, default=100_000)
+        parser.add_argument('--active', type=int, default=40, help='Pedidos recentes ainda em queued/preparing/ready.')
+        parser.add_argument('--days', type=int, default=365, help='Período do histórico gerado.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        dishes = self._seed_dishes(options['dishes'], rng, batch_size)
+        tables = self._seed_tables(options['tables'], batch_size)
+        customers = self._seed_customers(options['customers'], batch_size)
+        self._seed_orders(options, rng, dishes, tables, customers)
+
+        # bulk_create não passa pela API: a projeção da cozinha e os resumos de vendas
+        # são derivados dos pedidos aqui (as versões do cardápio e das mesas já mudaram acima)
+        call_command('rebuild_active_orders', stdout=self.stdout)
+        call_command('backfill_sales_rollups', stdout=self.stdout)
+
+    def _seed_dishes(self, count, rng, batch_size):
+        Dish.objects.bulk_create([
+            Dish(name=f'Prato {i}', description='Gerado para benchmark', price=Decimal(rng.randint(800, 9000)) / 100)
+            for i in range(count)
+        ], batch_size=batch_size)
+        bump_menu_version() # bulk_create não dispara post_save
+        self.stdout.write(f'{count} pratos criados.')
+        return list(Dish.objects.values_list('id', 'price'))
+
+    def _seed_tables(self, count, batch_size):
+        start = (Table.objects.aggregate(Max('number'))['number__max'] or 0) + 1
+        Table.objects.bulk_create([
+            Table(number=number, capacity=4, validation_code=f'B{number}')
+            for number in range(start, start + count)
+        ], batch_size=batch_size)
+        bump_tables_version() # Idem: os workers em execução recarregam os códigos
+        self.stdout.write(f'{count} mesas criadas.')
+        return list(Table.objects.values_list('id', flat=True))
+
+    def _seed_customers(self, count, batch_size):
+        start = User.objects.filter(username__startswith='bench-').count()
+        password = make_password(None) # Senha inutilizável: evita o custo do hash por usuário
+        User.objects.bulk_create([
+            User(username=f'bench-{n}', email=f'bench-{n}@example.com', password=password, type='customer')
+            for n in range(start, start + count)
+        ], batch_size=batch_size)
+        self.stdout.write(f'{count} clientes criados.')
+        return list(User.objects.filter(username__startswith='bench-').values_list('id', flat=True))
+
+    def _seed_orders(self, options, rng, dishes, tables, customers):
+        total, active, batch_size = options['orders'], options['active'], options['batch_size']
+        now = timezone.now()
+        span = timedelta(days=options['days']).total_seconds()
+
+        # IDs explícitos: o MySQL não devolve as PKs no bulk_create e precisamos delas nos itens
+        next_id = (Order.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+
+        created = 0
+        with explicit_created_at():
+            while created < total:
+                size = min(batch_size, total - created)
+                orders, items = [], []
+                for offset in range(size):
+                    position = created + offset
+                    # Os pedidos mais recentes ficam ativos; o resto é histórico
+                    age = span * (total - position) / total
+                    if total - position <= active:
+                        order_status = rng.choice(['queued', 'preparing', 'ready'])
+                    else:
+                        order_status = 'canceled' if rng.random() < 0.05 else 'completed'
+
+                    takeaway = rng.random() < 0.3
+                    order = Order(
+                        id=next_id + position,
+                        created_at=now - timedelta(seconds=age),
+                        type='takeaway' if takeaway else 'dine-in',
+                        user_id=rng.choice(customers) if customers and (takeaway or rng.random() < 0.5) else None,
+                        table_id=rng.choice(tables) if tables and not takeaway else None,
+                        status=order_status,
+                        payment_confirmed=order_status == 'completed',
+                        total_price=Decimal('0'),
+                    )
+                    for dish_id, price in rng.sample(dishes, k=min(len(dishes), rng.randint(1, 4))):
+                        quantity = rng.randint(1, 3)
+                        items.append(OrderItem(order_id=order.id, dish_id=dish_id, quantity=quantity, price=price))
+                        order.total_price += price * quantity
+                    orders.append(order)
+
+                with transaction.atomic():
+                    Order.objects.bulk_create(orders)
+                    OrderItem.objects.bulk_create(items, batch_size=batch_size)
+
+                created += size
+                self.stdout.write(f'{created}/{total} pedidos criados.')
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _active_orders_index():
+    return models.Index(
+        fields=['created_at'],
+        condition=models.Q(status__in=['queued', 'preparing']),
+        name='order_active_created_idx',
+    )
+
+
+def add_active_orders_index(apps, schema_editor):
+    # Índices parciais não existem no MySQL; lá a fila usa order_status_created_idx
+    if not schema_editor.connection.features.supports_partial_indexes:
+        return
+    schema_editor.add_index(apps.get_model('restaurant', 'Order'), _active_orders_index())
+
+
+def remove_active_orders_index(apps, schema_editor):
+    if not schema_editor.connection.features.supports_partial_indexes:
+        return
+    schema_editor.remove_index(apps.get_model('restaurant', 'Order'), _active_orders_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['table', 'status'], name='order_table_status_idx'),
+        ),
+        migrations.RunPython(add_active_orders_index, remove_active_orders_index),
+    ]
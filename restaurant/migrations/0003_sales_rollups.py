@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0002_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DishSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('hour', models.PositiveSmallIntegerField(verbose_name='Hora')),
+                ('order_type', models.CharField(choices=[('dine-in', 'Consumo no Local'), ('takeaway', 'Para Viagem')], max_length=50, verbose_name='Tipo de Pedido')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Quantidade')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Faturamento')),
+                ('dish', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='restaurant.dish', verbose_name='Prato')),
+                ('table', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='restaurant.table', verbose_name='Mesa')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Vendas por Prato',
+                'verbose_name_plural': 'Resumos de Vendas por Prato',
+                'indexes': [models.Index(fields=['date', 'hour'], name='dish_rollup_date_hour_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('hour', models.PositiveSmallIntegerField(verbose_name='Hora')),
+                ('order_type', models.CharField(choices=[('dine-in', 'Consumo no Local'), ('takeaway', 'Para Viagem')], max_length=50, verbose_name='Tipo de Pedido')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Pedidos')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Faturamento')),
+                ('table', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='restaurant.table', verbose_name='Mesa')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Vendas por Pedido',
+                'verbose_name_plural': 'Resumos de Vendas por Pedido',
+                'indexes': [models.Index(fields=['date', 'hour'], name='order_rollup_date_hour_idx')],
+            },
+        ),
+    ]
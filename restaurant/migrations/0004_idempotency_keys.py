@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0003_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Chave')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='Assinatura da Requisição')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Status HTTP')),
+                ('response', models.JSONField(blank=True, null=True, verbose_name='Resposta')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Data de Criação')),
+            ],
+            options={
+                'verbose_name': 'Chave de Idempotência',
+                'verbose_name_plural': 'Chaves de Idempotência',
+            },
+        ),
+    ]
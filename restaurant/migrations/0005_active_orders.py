@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0004_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActiveOrder',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='active', serialize=False, to='restaurant.order', verbose_name='Pedido')),
+                ('status', models.CharField(choices=[('pending', 'Pendente/Aguardando Pagamento'), ('queued', 'Na Fila (Cozinha)'), ('preparing', 'Em Preparação'), ('ready', 'Pronto'), ('completed', 'Concluído'), ('canceled', 'Cancelado')], max_length=50, verbose_name='Status do Pedido')),
+                ('created_at', models.DateTimeField(verbose_name='Data de Criação')),
+                ('table_number', models.PositiveIntegerField(blank=True, null=True, verbose_name='Número da Mesa')),
+                ('data', models.JSONField(verbose_name='Pedido Serializado')),
+            ],
+            options={
+                'verbose_name': 'Pedido em Andamento',
+                'verbose_name_plural': 'Pedidos em Andamento',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='active_status_created_idx')],
+            },
+        ),
+    ]
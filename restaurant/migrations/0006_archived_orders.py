@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0005_active_orders'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(verbose_name='Data de Criação')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Preço Total')),
+                ('type', models.CharField(choices=[('dine-in', 'Consumo no Local'), ('takeaway', 'Para Viagem')], max_length=50, verbose_name='Tipo de Pedido')),
+                ('status', models.CharField(choices=[('pending', 'Pendente/Aguardando Pagamento'), ('queued', 'Na Fila (Cozinha)'), ('preparing', 'Em Preparação'), ('ready', 'Pronto'), ('completed', 'Concluído'), ('canceled', 'Cancelado')], max_length=50, verbose_name='Status do Pedido')),
+                ('payment_confirmed', models.BooleanField(default=False, verbose_name='Pagamento Confirmado')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Data de Arquivamento')),
+                ('table', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='restaurant.table', verbose_name='Número da Mesa')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Pedido Arquivado',
+                'verbose_name_plural': 'Pedidos Arquivados',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantidade')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Preço Unitário')),
+                ('observations', models.TextField(blank=True, null=True, verbose_name='Observações')),
+                ('dish', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='restaurant.dish', verbose_name='Prato')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='restaurant.archivedorder', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'Item de Pedido Arquivado',
+                'verbose_name_plural': 'Itens de Pedidos Arquivados',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['created_at'], name='archived_order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['user', '-created_at'], name='archived_order_user_idx'),
+        ),
+    ]
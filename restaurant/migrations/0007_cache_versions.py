@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:24
+
+import time
+
+from django.db import migrations, models
+
+
+def create_versions(apps, schema_editor):
+    # Linhas já existentes: a leitura da versão fica em uma única query desde o início
+    CacheVersion = apps.get_model('restaurant', 'CacheVersion')
+    for name in ('menu', 'tables'):
+        CacheVersion.objects.using(schema_editor.connection.alias).get_or_create(
+            name=name, defaults={'version': time.time_ns()}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0006_archived_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Nome')),
+                ('version', models.BigIntegerField(verbose_name='Versão')),
+            ],
+            options={
+                'verbose_name': 'Versão de Cache',
+                'verbose_name_plural': 'Versões de Cache',
+            },
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+import time
+
+from django.db import migrations
+
+
+def create_kitchen_version(apps, schema_editor):
+    # Versão do quadro da cozinha (restaurant/kitchen.py), lida a cada kitchen_summary
+    CacheVersion = apps.get_model('restaurant', 'CacheVersion')
+    CacheVersion.objects.using(schema_editor.connection.alias).get_or_create(
+        name='kitchen', defaults={'version': time.time_ns()}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0007_cache_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_kitchen_version, migrations.RunPython.noop),
+    ]
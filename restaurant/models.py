@@ -1,5 +1,33 @@
 from django.db import models
 
+# Status que mantêm o pedido na tela da cozinha (FIFO)
+KITCHEN_STATUSES = ['queued', 'preparing']
+
+# Pedidos em andamento (cozinha + aguardando o garçom), projetados em ActiveOrder
+ACTIVE_STATUSES = KITCHEN_STATUSES + ['ready']
+
+# Máquina de estados do pedido: status de destino -> status de origem permitidos
+# pending -> queued -> preparing -> ready -> completed (canceled antes do preparo)
+ORDER_TRANSITIONS = {
+    'queued': ['pending'],
+    'preparing': ['queued'],
+    'ready': ['queued', 'preparing'], # A cozinha pode pular o 'preparing'
+    'completed': ['ready'],
+    'canceled': ['pending', 'queued'],
+}
+
+
+class OrderQuerySet(models.QuerySet):
+    def transition(self, status):
+        """
+        Aplica a transição com um único UPDATE condicional:
+        UPDATE ... SET status=<novo> WHERE status IN (<origens permitidas>).
+        Só altera a coluna status e não sofre lost update entre dois cozinheiros:
+        o segundo UPDATE não encontra mais a linha no status de origem.
+        Retorna a quantidade de pedidos alterados.
+        """
+        return self.filter(status__in=ORDER_TRANSITIONS[status]).update(status=status)
+
 
 class Order(models.Model):
     TYPE_CHOICES = [
@@ -25,10 +53,20 @@ class Order(models.Model):
     default='pending')
     payment_confirmed = models.BooleanField(default=False, verbose_name='Pagamento Confirmado')
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
         ordering = ['-created_at']
+        indexes = [
+            # Fila da cozinha: status IN (...) ORDER BY created_at
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # Histórico do cliente: user = X ORDER BY -created_at
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            # Pedidos abertos de uma mesa
+            models.Index(fields=['table', 'status'], name='order_table_status_idx'),
+        ]
     
     def __str__(self):
         return f"Pedido #{self.pk} - {self.get_status_display()}" # type: ignore
@@ -64,4 +102,138 @@ class Table(models.Model):
         verbose_name_plural = 'Mesas'
     
     def __str__(self):
-        return f'Mesa {self.number}'
\ No newline at end of file
+        return f'Mesa {self.number}'
+
+
+# Índice parcial só com os pedidos ativos da cozinha. Não fica em Meta.indexes
+# porque MySQL não suporta índices com WHERE; a migração 0002 só o cria quando
+# o banco suporta (SQLite, PostgreSQL). No MySQL, order_status_created_idx cobre a fila.
+ACTIVE_ORDERS_INDEX = models.Index(
+    fields=['created_at'],
+    condition=models.Q(status__in=KITCHEN_STATUSES),
+    name='order_active_created_idx',
+)
+
+
+class ActiveOrder(models.Model):
+    """
+    Projeção dos pedidos em andamento (queued/preparing/ready) para as telas da
+    cozinha e dos garçons: o pedido já serializado, com itens e número da mesa.
+    Mantida na mesma transação da criação e de cada transição (restaurant/active.py);
+    `rebuild_active_orders` a reconstrói a partir de Order.
+    """
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, primary_key=True, related_name='active', verbose_name='Pedido')
+    status = models.CharField(max_length=50, choices=Order.STATUS_CHOICES, verbose_name='Status do Pedido')
+    created_at = models.DateTimeField(verbose_name='Data de Criação')
+    table_number = models.PositiveIntegerField(blank=True, null=True, verbose_name='Número da Mesa')
+    data = models.JSONField(verbose_name='Pedido Serializado')
+
+    class Meta:
+        verbose_name = 'Pedido em Andamento'
+        verbose_name_plural = 'Pedidos em Andamento'
+        indexes = [models.Index(fields=['status', 'created_at'], name='active_status_created_idx')]
+
+
+class ArchivedOrder(models.Model):
+    """
+    Pedido concluído ou cancelado movido para fora da tabela quente pelo
+    comando archive_orders (restaurant/archive.py). Mantém o id original e os
+    mesmos campos de Order, então o OrderSerializer serve para os dois.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey('users.User', on_delete=models.PROTECT, related_name='+', verbose_name='Usuário', blank=True, null=True)
+    created_at = models.DateTimeField(verbose_name='Data de Criação')
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Preço Total')
+    type = models.CharField(max_length=50, verbose_name='Tipo de Pedido', choices=Order.TYPE_CHOICES)
+    table = models.ForeignKey(Table, on_delete=models.PROTECT, related_name='+', verbose_name='Número da Mesa', blank=True, null=True)
+    status = models.CharField(max_length=50, verbose_name='Status do Pedido', choices=Order.STATUS_CHOICES)
+    payment_confirmed = models.BooleanField(default=False, verbose_name='Pagamento Confirmado')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='Data de Arquivamento')
+
+    class Meta:
+        verbose_name = 'Pedido Arquivado'
+        verbose_name_plural = 'Pedidos Arquivados'
+        ordering = ['-created_at']
+        indexes = [
+            # Mesmas consultas do histórico em Order: geral e por cliente
+            models.Index(fields=['created_at'], name='archived_order_created_idx'),
+            models.Index(fields=['user', '-created_at'], name='archived_order_user_idx'),
+        ]
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items', verbose_name='Pedido')
+    dish = models.ForeignKey(Dish, on_delete=models.PROTECT, related_name='+', verbose_name='Prato')
+    quantity = models.PositiveIntegerField(verbose_name='Quantidade')
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Preço Unitário')
+    observations = models.TextField(blank=True, null=True, verbose_name='Observações')
+
+    class Meta:
+        verbose_name = 'Item de Pedido Arquivado'
+        verbose_name_plural = 'Itens de Pedidos Arquivados'
+
+
+class OrderSalesRollup(models.Model):
+    """
+    Pedidos concluídos e faturamento por hora, tipo de pedido e mesa.
+    As linhas são somas parciais: os relatórios sempre agregam com SUM.
+    """
+    date = models.DateField(verbose_name='Data')
+    hour = models.PositiveSmallIntegerField(verbose_name='Hora')
+    order_type = models.CharField(max_length=50, choices=Order.TYPE_CHOICES, verbose_name='Tipo de Pedido')
+    table = models.ForeignKey(Table, on_delete=models.PROTECT, blank=True, null=True, verbose_name='Mesa')
+    orders = models.PositiveIntegerField(default=0, verbose_name='Pedidos')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Faturamento')
+
+    class Meta:
+        verbose_name = 'Resumo de Vendas por Pedido'
+        verbose_name_plural = 'Resumos de Vendas por Pedido'
+        indexes = [models.Index(fields=['date', 'hour'], name='order_rollup_date_hour_idx')]
+
+
+class DishSalesRollup(models.Model):
+    """
+    Quantidade vendida e faturamento por hora, prato, tipo de pedido e mesa.
+    """
+    date = models.DateField(verbose_name='Data')
+    hour = models.PositiveSmallIntegerField(verbose_name='Hora')
+    dish = models.ForeignKey(Dish, on_delete=models.PROTECT, verbose_name='Prato')
+    order_type = models.CharField(max_length=50, choices=Order.TYPE_CHOICES, verbose_name='Tipo de Pedido')
+    table = models.ForeignKey(Table, on_delete=models.PROTECT, blank=True, null=True, verbose_name='Mesa')
+    quantity = models.PositiveIntegerField(default=0, verbose_name='Quantidade')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Faturamento')
+
+    class Meta:
+        verbose_name = 'Resumo de Vendas por Prato'
+        verbose_name_plural = 'Resumos de Vendas por Prato'
+        indexes = [models.Index(fields=['date', 'hour'], name='dish_rollup_date_hour_idx')]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Resposta gravada de um POST com cabeçalho Idempotency-Key (ver restaurant/idempotency.py).
+    Sem status_code = requisição ainda em andamento.
+    """
+    key = models.CharField(max_length=255, unique=True, verbose_name='Chave')
+    fingerprint = models.CharField(max_length=64, verbose_name='Assinatura da Requisição')
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Status HTTP')
+    response = models.JSONField(blank=True, null=True, verbose_name='Resposta')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Data de Criação')
+
+    class Meta:
+        verbose_name = 'Chave de Idempotência'
+        verbose_name_plural = 'Chaves de Idempotência'
+
+
+class CacheVersion(models.Model):
+    """
+    Versão dos caches em memória de cada worker (ver restaurant/versions.py).
+    Fica no banco para que todos os workers e processos vejam a mesma versão.
+    """
+    name = models.CharField(max_length=50, primary_key=True, verbose_name='Nome')
+    version = models.BigIntegerField(verbose_name='Versão')
+
+    class Meta:
+        verbose_name = 'Versão de Cache'
+        verbose_name_plural = 'Versões de Cache'
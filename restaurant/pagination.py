@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """
+    Paginação por cursor em (created_at, id): o custo de cada página não
+    cresce com o histórico, ao contrário de LIMIT/OFFSET.
+    URL: /api/orders/?cursor=...&page_size=50
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,123 @@
+"""
+Serialização somente leitura a partir de .values(), para as listagens quentes.
+
+Um ModelSerializer é instanciado e introspectado a cada resposta, e cada objeto
+passa por um Field.get_attribute/to_representation por campo. RowReader faz essa
+introspecção uma vez: compila, a partir do próprio serializer, a lista de
+colunas do .values() e o conversor de cada campo, e depois só monta dicts a
+partir das linhas. O resultado é idêntico ao do serializer (mesmos nomes, ordem
+e formatos), que continua sendo usado nas escritas e no detalhe.
+
+    reader = get_reader(OrderSerializer, fields=None, expand=frozenset({'table'}))
+    rows = list(reader.values(Order.objects.filter(...)))
+    data = reader.serialize(rows, Order)
+
+Suporta campos simples, chaves estrangeiras como PK, relações reversas
+aninhadas com many=True (ex.: `items`) e os `expandable_fields` do serializer.
+"""
+from functools import lru_cache
+
+from rest_framework import serializers
+
+# Campos cujo valor vindo do banco já é a representação final
+IDENTITY_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+)
+
+
+def _converter(field):
+    if isinstance(field, IDENTITY_FIELDS):
+        return None
+    # Decimal, datas, ...: o próprio campo do DRF formata, sem instanciar o serializer
+    return field.to_representation
+
+
+class RowReader:
+    def __init__(self, serializer_class, fields=None, expand=frozenset(), prefix=''):
+        serializer = serializer_class()
+        model = serializer.Meta.model
+        expandable = getattr(serializer_class, 'expandable_fields', {})
+
+        self.plan = [] # [(nome, coluna, conversor, leitor expandido)]
+        self.nested = [] # [(nome, leitor dos filhos)]
+        for name, field in serializer.fields.items():
+            if field.write_only or (fields is not None and name not in fields):
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                self.nested.append((name, RowReader(type(field.child))))
+            elif isinstance(field, serializers.RelatedField):
+                column = prefix + model._meta.get_field(field.source).attname
+                expanded = None
+                if name in expand and name in expandable:
+                    expanded = RowReader(expandable[name], prefix=f'{prefix}{field.source}__')
+                self.plan.append((name, column, None, expanded))
+            else:
+                self.plan.append((name, prefix + field.source, _converter(field), None))
+
+        columns = []
+        for _, column, _, expanded in self.plan:
+            columns.append(column)
+            if expanded is not None:
+                columns.extend(expanded.columns)
+        if self.nested:
+            columns.append(prefix + 'id') # Chave dos filhos
+        self.columns = list(dict.fromkeys(columns))
+
+    def values(self, queryset, *extra, **expressions):
+        """
+        O QuerySet como dicts com as colunas do leitor (mais `extra`, ex.: as da ordenação).
+        """
+        return queryset.prefetch_related(None).values(*dict.fromkeys([*self.columns, *extra]), **expressions)
+
+    def fetch_nested(self, model, rows):
+        """
+        Uma query por relação aninhada: {nome: {id do pai: [filhos já serializados]}}.
+        """
+        nested = {}
+        if not rows:
+            return {name: {} for name, _ in self.nested}
+        ids = [row['id'] for row in rows]
+        for name, reader in self.nested:
+            relation = model._meta.get_field(name)
+            parent = relation.field.attname
+            children = relation.related_model.objects.filter(**{f'{parent}__in': ids}).order_by(parent, 'pk')
+            by_parent = {}
+            child_rows = list(reader.values(children, parent))
+            for row, data in zip(child_rows, reader.build(child_rows)):
+                by_parent.setdefault(row[parent], []).append(data)
+            nested[name] = by_parent
+        return nested
+
+    def build(self, rows, nested=None):
+        """
+        Monta as representações a partir de linhas já lidas (sem queries).
+        """
+        plan, children = self.plan, self.nested
+        result = []
+        for row in rows:
+            data = {}
+            for name, column, converter, expanded in plan:
+                value = row[column]
+                if expanded is not None and value is not None:
+                    value = expanded.build((row,))[0]
+                elif converter is not None and value is not None:
+                    value = converter(value)
+                data[name] = value
+            for name, _ in children:
+                data[name] = nested[name].get(row['id'], [])
+            result.append(data)
+        return result
+
+    def serialize(self, rows, model):
+        return self.build(rows, self.fetch_nested(model, rows))
+
+
+@lru_cache(maxsize=128)
+def get_reader(serializer_class, fields=None, expand=frozenset()):
+    """
+    Leitor compilado por combinação de serializer, ?fields= e ?expand= (em cache).
+    """
+    return RowReader(serializer_class, fields, expand)
@@ -0,0 +1,88 @@
+"""
+Tabelas de resumo (rollup) de vendas.
+
+Cada pedido que chega em 'completed' soma seus valores nas linhas de
+OrderSalesRollup / DishSalesRollup do seu balde (data e hora locais de criação).
+Os relatórios leem apenas essas tabelas, nunca Order/OrderItem. O backfill
+(backfill_sales_rollups) lê também os pedidos arquivados (ArchivedOrder).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from restaurant.models import DishSalesRollup, Order, OrderSalesRollup
+
+
+def _bucket(created_at):
+    # Data/hora locais calculadas aqui, e não no banco: evita depender das tabelas de fuso do MySQL
+    local = timezone.localtime(created_at)
+    return local.date(), local.hour
+
+
+def aggregate_orders(orders):
+    """
+    Agrega o QuerySet de pedidos (Order ou ArchivedOrder) em somas por balde, com duas
+    queries (pedidos e itens). Retorna (grupos por pedido, grupos por prato).
+    """
+    order_groups = defaultdict(lambda: [0, Decimal('0')])
+    dish_groups = defaultdict(lambda: [0, Decimal('0')])
+    buckets = {}
+
+    rows = orders.order_by().values_list('id', 'created_at', 'type', 'table_id', 'total_price')
+    for order_id, created_at, order_type, table_id, total_price in rows:
+        date, hour = _bucket(created_at)
+        buckets[order_id] = (date, hour, order_type, table_id)
+        group = order_groups[(date, hour, order_type, table_id)]
+        group[0] += 1
+        group[1] += total_price
+
+    # Order ou ArchivedOrder: os itens vêm da relação 'items' do modelo
+    item_model = orders.model._meta.get_field('items').related_model
+    items = item_model.objects.filter(order__in=orders.order_by().values('pk')).order_by().values_list(
+        'order_id', 'dish_id', 'quantity', 'price'
+    )
+    for order_id, dish_id, quantity, price in items:
+        date, hour, order_type, table_id = buckets[order_id]
+        group = dish_groups[(date, hour, dish_id, order_type, table_id)]
+        group[0] += quantity
+        group[1] += price * quantity
+
+    return order_groups, dish_groups
+
+
+def record_completed_orders(order_ids):
+    """
+    Atualização incremental: soma os pedidos recém-concluídos nas linhas existentes
+    (UPDATE ... SET orders = orders + n) ou cria a linha do balde.
+    Deve rodar na mesma transação da mudança de status.
+    """
+    order_groups, dish_groups = aggregate_orders(Order.objects.filter(pk__in=order_ids))
+
+    for (date, hour, order_type, table_id), (count, revenue) in order_groups.items():
+        keys = {'date': date, 'hour': hour, 'order_type': order_type, 'table_id': table_id}
+        if not OrderSalesRollup.objects.filter(**keys).update(orders=F('orders') + count, revenue=F('revenue') + revenue):
+            OrderSalesRollup.objects.create(**keys, orders=count, revenue=revenue)
+
+    for (date, hour, dish_id, order_type, table_id), (quantity, revenue) in dish_groups.items():
+        keys = {'date': date, 'hour': hour, 'dish_id': dish_id, 'order_type': order_type, 'table_id': table_id}
+        if not DishSalesRollup.objects.filter(**keys).update(quantity=F('quantity') + quantity, revenue=F('revenue') + revenue):
+            DishSalesRollup.objects.create(**keys, quantity=quantity, revenue=revenue)
+
+
+def insert_rollups(orders):
+    """
+    Usado no backfill: grava as somas do lote como linhas novas, sem UPDATE.
+    Baldes repetidos entre lotes viram linhas parciais, somadas pelos relatórios.
+    """
+    order_groups, dish_groups = aggregate_orders(orders)
+    OrderSalesRollup.objects.bulk_create([
+        OrderSalesRollup(date=date, hour=hour, order_type=order_type, table_id=table_id, orders=count, revenue=revenue)
+        for (date, hour, order_type, table_id), (count, revenue) in order_groups.items()
+    ])
+    DishSalesRollup.objects.bulk_create([
+        DishSalesRollup(date=date, hour=hour, dish_id=dish_id, order_type=order_type, table_id=table_id,
+                        quantity=quantity, revenue=revenue)
+        for (date, hour, dish_id, order_type, table_id), (quantity, revenue) in dish_groups.items()
+    ])
@@ -1,4 +1,8 @@
-from restaurant.models import Dish, OrderItem, Table, Order
+from decimal import Decimal
+
+from django.db import transaction
+from restaurant.models import ORDER_TRANSITIONS, Dish, OrderItem, Table, Order
+from restaurant.tables import get_table_codes
 from rest_framework import serializers
 
 
@@ -14,52 +18,174 @@ class TableSerializer(serializers.ModelSerializer):
         fields = ['id', 'number', 'capacity', 'is_available', 'validation_code']
 
 
+class OrderTableSerializer(serializers.ModelSerializer):
+    """
+    Versão expandida da mesa dentro do pedido (?expand=table).
+    Não expõe o validation_code.
+    """
+    class Meta:
+        model = Table
+        fields = ['id', 'number']
+
+
+def requested_fields(request):
+    """
+    Lê ?fields=id,status,... da requisição. Retorna None quando não informado.
+    """
+    if request is None:
+        return None
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(',') if field.strip()}
+
+
+def requested_expansions(request):
+    if request is None:
+        return set()
+    return {field.strip() for field in request.query_params.get('expand', '').split(',') if field.strip()}
+
+
+_integer_pk = serializers.IntegerField()
+
+
+def _parse_pk(field, data):
+    """
+    PK inteira: aceita 3, '3' e 3.0; recusa booleanos e valores não inteiros (1.5, '1.5'),
+    que int() truncaria para outro registro.
+    """
+    if isinstance(data, bool):
+        field.fail('incorrect_type', data_type=type(data).__name__)
+    try:
+        return _integer_pk.to_internal_value(data)
+    except serializers.ValidationError:
+        field.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class DishPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolve o prato a partir do mapa carregado pelo OrderItemListSerializer,
+    evitando um SELECT por item durante a validação.
+    """
+
+    def to_internal_value(self, data):
+        pk = _parse_pk(self, data)
+        dishes = self.context.get('dishes_by_id')
+        if dishes is None:
+            return super().to_internal_value(pk)
+        try:
+            return dishes[pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class TablePrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolve a mesa pelo cache de códigos (restaurant.tables), sem SELECT.
+    """
+
+    def to_internal_value(self, data):
+        table = get_table_codes().get_table(_parse_pk(self, data))
+        if table is None:
+            self.fail('does_not_exist', pk_value=data)
+        return table
+
+
+class OrderItemListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        # Busca todos os pratos referenciados em uma única query
+        if isinstance(data, list):
+            dish_ids = set()
+            for item in data:
+                try:
+                    dish_ids.add(_integer_pk.to_internal_value(item.get('dish')))
+                except (AttributeError, serializers.ValidationError):
+                    continue # O campo reporta o erro na validação do item
+            self.context['dishes_by_id'] = Dish.objects.in_bulk(dish_ids)
+        return super().to_internal_value(data)
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
+    dish = DishPrimaryKeyField(queryset=Dish.objects.all())
+
     class Meta:
         model = OrderItem
         fields = ['id', 'order', 'dish', 'quantity', 'observations']
         read_only_fields = ['price', 'order']
+        list_serializer_class = OrderItemListSerializer
 
 
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
+    table = TablePrimaryKeyField(queryset=Table.objects.all(), required=False, allow_null=True)
+
+    # Campos que podem trocar a PK pelo objeto com ?expand=
+    expandable_fields = {
+        'table': OrderTableSerializer,
+    }
 
     class Meta:
         model = Order
         fields = ['id', 'user', 'created_at', 'total_price', 'type', 'table', 'status', 'payment_confirmed', 'items']
-        read_only_fields = ['total_price', 'created_at', 'payment_confirmed']
+        # status só muda pelas transições (start_preparing, mark_ready, ..., bulk_transition)
+        read_only_fields = ['total_price', 'created_at', 'status', 'payment_confirmed']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
 
+        # Seleção de campos só vale para leitura; escrita usa o payload completo
+        if request is None or request.method != 'GET':
+            return
+
+        # ?fields=id,status,total_price permite às telas de lista dispensarem os itens
+        fields = requested_fields(request)
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+        for name in requested_expansions(request) & set(self.fields):
+            if name in self.expandable_fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True)
+
+    @transaction.atomic
     def create(self, validated_data):
         # Remove os itens do payload para criar o pedido primeiro
         items_data = validated_data.pop('items')
-        
-        # Cria o Pedido (Order)
-        order = Order.objects.create(total_price=0, **validated_data)
-        
-        total_accumulated = 0
-
-        # Loop para criar os itens e somar o total
-        for item_data in items_data:
-            dish = item_data['dish'] # Pega o objeto Prato
-            quantity = item_data['quantity']
-            
-            # Pega o preço atual do prato do banco de dados (Segurança)
-            current_price = dish.price
-            
-            # Cria o Item vinculado ao Pedido
-            OrderItem.objects.create(
+
+        # Calcula o total antes do INSERT, usando o preço atual do prato (Segurança)
+        total_price = sum(
+            (item_data['dish'].price * item_data['quantity'] for item_data in items_data),
+            Decimal('0'),
+        )
+
+        # Cria o Pedido (Order) já com o total, sem um segundo UPDATE
+        order = Order.objects.create(total_price=total_price, **validated_data)
+
+        # Cria todos os itens vinculados ao Pedido em um único INSERT
+        OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
-                dish=dish,
-                quantity=quantity,
-                price=current_price, # Grava o preço unitário histórico
+                dish=item_data['dish'],
+                quantity=item_data['quantity'],
+                price=item_data['dish'].price, # Grava o preço unitário histórico
                 observations=item_data.get('observations', '')
             )
-            
-            # Soma ao total do pedido
-            total_accumulated += (current_price * quantity)
+            for item_data in items_data
+        ])
+
+        return order
+
 
-        # Atualiza o preço total do pedido e salva
-        order.total_price = total_accumulated # type: ignore
-        order.save()
+class BulkTransitionSerializer(serializers.Serializer):
+    """
+    Corpo da transição em lote: lista de pedidos OU uma mesa, e o status de destino.
+    """
+    status = serializers.ChoiceField(choices=list(ORDER_TRANSITIONS))
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=200)
+    table = serializers.IntegerField(required=False)
 
-        return order
\ No newline at end of file
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('table' in attrs):
+            raise serializers.ValidationError("Informe 'ids' ou 'table' (apenas um dos dois).")
+        return attrs
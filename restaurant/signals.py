@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from restaurant.cache import bump_menu_version
+from restaurant.models import Dish, Table
+from restaurant.tables import bump_tables_version
+
+
+@receiver(post_save, sender=Dish)
+@receiver(post_delete, sender=Dish)
+def invalidate_menu_cache(sender, instance, **kwargs):
+    """
+    Qualquer criação, edição ou remoção de prato gera uma nova versão do cardápio.
+    A versão só muda após o commit, para nenhuma leitura concorrente guardar em cache
+    dados ainda não confirmados com a versão nova.
+    Obs.: QuerySet.update() não dispara sinais; chame bump_menu_version() nesse caso.
+    """
+    transaction.on_commit(bump_menu_version)
+
+
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+def invalidate_table_codes(sender, instance, **kwargs):
+    """
+    Mesa criada, editada (ex.: QR Code trocado) ou removida: todos os workers
+    recarregam os códigos na próxima validação. A versão (no banco) muda na mesma
+    transação, então fica visível junto com a escrita.
+    Obs.: QuerySet.update() não dispara sinais; chame bump_tables_version() nesse caso.
+    """
+    bump_tables_version()
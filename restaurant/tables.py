@@ -0,0 +1,87 @@
+"""
+Cache em memória dos códigos de validação (QR Code) das mesas.
+
+Cada worker guarda {table_id: TableCode} carregado com uma única query e valida
+os pedidos na mesa lendo do banco só a versão (restaurant/versions.py). Qualquer
+escrita em Table incrementa essa versão na mesma transação; o worker que encontrar
+uma versão diferente da sua recarrega o mapa, então um código trocado deixa de
+valer em todos os workers assim que a escrita é confirmada.
+"""
+import threading
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS
+
+from restaurant.models import Table
+from restaurant.versions import bump_version, get_version
+from setup.metrics import record_cache
+
+TABLES_VERSION = 'tables'
+
+TableCode = namedtuple('TableCode', ['number', 'validation_code', 'is_available'])
+
+
+def get_tables_version():
+    return get_version(TABLES_VERSION)
+
+
+def bump_tables_version():
+    """
+    Chame dentro da transação da escrita, inclusive após bulk_create/update(),
+    que não disparam os sinais.
+    """
+    bump_version(TABLES_VERSION)
+
+
+class TableCodes:
+    def __init__(self):
+        self._tables = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._tables = None
+
+    def _load(self):
+        return {
+            pk: TableCode(number, validation_code, is_available)
+            for pk, number, validation_code, is_available in Table.objects.values_list(
+                'pk', 'number', 'validation_code', 'is_available'
+            )
+        }
+
+    def get(self, table_id):
+        """
+        Retorna o TableCode da mesa ou None se ela não existir.
+        """
+        version = get_tables_version()
+        with self._lock:
+            hit = self._tables is not None and self._version == version
+            record_cache('tables', hit)
+            if not hit:
+                self._tables = self._load()
+                self._version = version
+            return self._tables.get(table_id)
+
+    def get_table(self, table_id):
+        """
+        Instância de Table montada a partir do cache, para atribuir ao pedido sem SELECT.
+        `capacity` fica adiada e só é lida do banco se for acessada.
+        """
+        code = self.get(table_id)
+        if code is None:
+            return None
+        return Table.from_db(
+            DEFAULT_DB_ALIAS,
+            # Valores na ordem dos campos do modelo (from_db preenche os demais como adiados)
+            ['id', 'number', 'is_available', 'validation_code'],
+            [table_id, code.number, code.is_available, code.validation_code],
+        )
+
+
+_codes = TableCodes()
+
+
+def get_table_codes():
+    return _codes
@@ -1,9 +1,66 @@
+import asyncio
+import hashlib
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import brotli
+import msgpack
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase, APITransactionTestCase
+from rest_framework.authtoken.models import Token
+from setup.compression import CompressionMiddleware
+from setup.metrics import get_metrics_registry
+from setup.routers import is_sticky
+from setup import querycheck
+from setup.querycheck import QueryBudgetExceeded, audit_queries
 from users.models import User
-from restaurant.models import Table, Dish, Order
+from restaurant.active import refresh_active_orders
+from restaurant.cache import get_menu_cache
+from restaurant.compact import COMPACT_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, STATUS_CODES
+from restaurant.events import InProcessBroker, RedisBroker, get_broker
+from restaurant.idempotency import get_idempotency_store
+from restaurant.kitchen import get_kitchen_board
+from restaurant.tables import TableCodes, bump_tables_version, get_table_codes
+from restaurant.serializers import DishSerializer, OrderSerializer, TableSerializer
+from restaurant.views import OrderViewSet
+from restaurant.models import ActiveOrder, ArchivedOrder, ArchivedOrderItem, CacheVersion, IdempotencyKey, Table, Dish, DishSalesRollup, Order, OrderItem, OrderSalesRollup
+
+
+def project_orders():
+    """
+    Pedidos criados direto pelo ORM não passam pela API: monta a projeção ActiveOrder deles.
+    """
+    refresh_active_orders(list(Order.objects.values_list('pk', flat=True)))
+
+
+class RecordingBroker(InProcessBroker):
+    """
+    Broker substituto usado nos testes: guarda tudo o que foi publicado.
+    """
+    published = []
+
+    def publish(self, event, data):
+        self.published.append((event, data))
+        super().publish(event, data)
 
+
+# A réplica de teste é outra conexão ao mesmo banco e não enxerga a transação de cada
+# teste; as leituras na réplica são testadas à parte, em ReplicaRoutingTests.
+@override_settings(REPLICA_DATABASE=None)
 class RestaurantTests(APITestCase):
     
     def setUp(self):
@@ -23,6 +80,11 @@ class RestaurantTests(APITestCase):
         # 4. Cria um Prato Ativo
         self.dish = Dish.objects.create(name='Hamburguer', price=25.00, description='Bom')
         
+        # O cache do cardápio vive em memória e sobreviveria entre os testes
+        get_menu_cache().clear()
+        get_kitchen_board().reset()
+        get_table_codes().reset()
+
         # URLs (usamos reverse para não escrever '/api/orders/' na mão)
         self.url_orders = reverse('order-list') # Nome definido no router (basename='order')
         self.url_dishes = reverse('dish-list')
@@ -86,4 +148,972 @@ class RestaurantTests(APITestCase):
         # Esperamos erro 400 Bad Request
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         # O pedido não deve ter sido criado no banco
-        self.assertEqual(Order.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_order_create_queries_do_not_grow_with_items(self):
+        """
+        Garante que o número de queries da criação não depende da quantidade de itens.
+        """
+        self.client.force_authenticate(user=self.user) # type: ignore
+        dishes = [Dish.objects.create(name=f'Prato {i}', price=10, description='x') for i in range(5)]
+        get_table_codes().get(self.table.id) # Códigos das mesas já carregados, como em produção # type: ignore
+
+        def post_order(items):
+            payload = {
+                "type": "dine-in",
+                "table": self.table.id, # type: ignore
+                "validation_code": "SEGREDO",
+                "items": items,
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(self.url_orders, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return response, len(ctx.captured_queries)
+
+        _, single_item = post_order([{"dish": self.dish.id, "quantity": 1}]) # type: ignore
+        response, many_items = post_order([{"dish": dish.id, "quantity": 2} for dish in dishes]) # type: ignore
+
+        self.assertEqual(single_item, many_items)
+        self.assertEqual(float(response.data['total_price']), 100.00) # 5 * 2 * 10.00 # type: ignore
+        self.assertEqual(OrderItem.objects.filter(order_id=response.data['id']).count(), 5) # type: ignore
+
+    def test_table_code_change_reaches_other_workers(self):
+        """
+        A versão dos códigos fica no banco: outro worker, sem cache em comum, deixa de aceitar o código antigo.
+        """
+        other_worker = TableCodes()
+        self.assertEqual(other_worker.get(self.table.id).validation_code, 'SEGREDO') # type: ignore
+
+        self.table.validation_code = 'NOVO'
+        self.table.save()
+        get_menu_cache().clear() # Nada em comum entre os caches em memória dos workers
+        self.assertEqual(other_worker.get(self.table.id).validation_code, 'NOVO') # type: ignore
+
+        Table.objects.filter(pk=self.table.pk).update(validation_code='OUTRO')
+        bump_tables_version() # update() não dispara o sinal
+        self.assertEqual(other_worker.get(self.table.id).validation_code, 'OUTRO') # type: ignore
+
+    def test_order_status_is_read_only(self):
+        """
+        PUT/PATCH não alteram o status: ele só muda pelas ações de transição.
+        """
+        order = Order.objects.create(total_price=25, table=self.table, user=self.user, status='queued')
+        self.client.force_authenticate(user=self.admin) # type: ignore
+
+        response = self.client.patch(reverse('order-detail', args=[order.id]), {'status': 'completed'}, format='json') # type: ignore
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'queued') # type: ignore
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'queued')
+
+        # Pedido pronto: o PATCH com status=completed não o conclui sem gravar os resumos de vendas
+        Order.objects.filter(pk=order.pk).update(status='ready')
+        self.client.patch(reverse('order-detail', args=[order.id]), {'status': 'completed'}, format='json') # type: ignore
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'ready')
+        self.assertFalse(OrderSalesRollup.objects.exists())
+        self.client.patch(reverse('order-mark-completed', args=[order.id])) # type: ignore
+        self.assertEqual(OrderSalesRollup.objects.get().orders, 1)
+
+    def test_order_invalid_dish_is_not_created(self):
+        """
+        Um prato inexistente invalida o pedido inteiro, sem gravar nada.
+        """
+        self.client.force_authenticate(user=self.user) # type: ignore
+
+        payload = {
+            "type": "dine-in",
+            "table": self.table.id, # type: ignore
+            "validation_code": "SEGREDO",
+            "items": [
+                {"dish": self.dish.id, "quantity": 1}, # type: ignore
+                {"dish": 9999, "quantity": 1},
+            ]
+        }
+
+        response = self.client.post(self.url_orders, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(OrderItem.objects.count(), 0)
+
+        # IDs não inteiros não são truncados para outro prato ou mesa
+        payload['items'] = [{"dish": self.dish.id + 0.5, "quantity": 1}] # type: ignore
+        response = self.client.post(self.url_orders, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('dish', response.data['items'][0]) # type: ignore
+
+        payload['items'] = [{"dish": str(self.dish.id), "quantity": 1}] # type: ignore
+        payload['table'] = self.table.id + 0.5 # type: ignore
+        response = self.client.post(self.url_orders, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('table', response.data) # type: ignore
+        self.assertEqual(Order.objects.count(), 0)
+
+
+    @override_settings(KITCHEN_EVENTS_BROKER='restaurant.tests.RecordingBroker')
+    def test_kitchen_events_published(self):
+        """
+        Criação e saída da fila geram eventos para as telas da cozinha.
+        """
+        RecordingBroker.published = []
+        self.client.force_authenticate(user=self.user) # type: ignore
+        payload = {
+            "type": "dine-in",
+            "table": self.table.id, # type: ignore
+            "validation_code": "SEGREDO",
+            "items": [{"dish": self.dish.id, "quantity": 1}], # type: ignore
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url_orders, payload, format='json')
+        order_id = response.data['id'] # type: ignore
+
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('order-mark-ready', args=[order_id]))
+
+        events = [event for event, _ in RecordingBroker.published]
+        self.assertEqual(events, ['order.added', 'order.removed'])
+        self.assertEqual(RecordingBroker.published[0][1]['id'], order_id)
+        self.assertEqual(RecordingBroker.published[1][1], {'id': order_id, 'status': 'ready'})
+
+    async def test_kitchen_stream_snapshot(self):
+        """
+        O stream começa com um snapshot da fila e exige um funcionário.
+        """
+        await Order.objects.acreate(total_price=10, table=self.table, status='queued')
+        await Order.objects.acreate(total_price=10, table=self.table, status='ready')
+        await sync_to_async(project_orders)()
+        url = reverse('order-stream')
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        token = await Token.objects.acreate(user=self.admin)
+        response = await self.async_client.get(url, headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = aiter(response.streaming_content)
+        first = (await anext(chunks)).decode()
+        await chunks.aclose() # type: ignore
+
+        self.assertTrue(first.startswith('event: snapshot\n'))
+        self.assertIn('"status": "queued"', first)
+        self.assertNotIn('"status": "ready"', first)
+
+        response = await self.async_client.post(url, headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_redis_broker_fans_out_and_resyncs(self):
+        """
+        Mensagens recebidas do canal do Redis chegam aos inscritos locais; após reconexão, o stream reenvia o snapshot.
+        """
+        broker = RedisBroker('redis://127.0.0.1:1/0') # Conexão só é aberta no primeiro uso
+        broker._start = lambda: None # Sem a thread de escuta: as mensagens entram por _deliver
+        queue = broker.subscribe()
+        broker._deliver(json.dumps({'event': 'order.removed', 'data': {'id': 7, 'status': 'ready'}}).encode())
+        message = await asyncio.wait_for(queue.get(), timeout=1)
+        self.assertEqual(message, {'event': 'order.removed', 'data': {'id': 7, 'status': 'ready'}})
+        broker.unsubscribe(queue)
+
+        token = await Token.objects.acreate(user=self.admin)
+        with mock.patch('restaurant.views.get_broker', return_value=broker):
+            response = await self.async_client.get(reverse('order-stream'), headers={'Authorization': f'Token {token.key}'})
+            chunks = aiter(response.streaming_content)
+            await anext(chunks)
+            InProcessBroker.publish(broker, 'resync', {})
+            second = (await anext(chunks)).decode()
+            await chunks.aclose() # type: ignore
+        self.assertTrue(second.startswith('event: snapshot\n'))
+
+
+    def test_menu_cached_with_etag(self):
+        """
+        O cardápio é servido do cache (só a query da versão) e responde 304 para GET condicional.
+        """
+        response = self.client.get(self.url_dishes)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1): # Versão, lida do banco
+            response = self.client.get(self.url_dishes)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.data[0]['name'], 'Hamburguer') # type: ignore
+
+        response = self.client.get(self.url_dishes, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('dish-detail', args=[self.dish.id])) # type: ignore
+        self.assertEqual(response.data['price'], '25.00') # type: ignore
+        self.assertEqual(self.client.get(reverse('dish-detail', args=[9999])).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_menu_cache_invalidated_on_dish_change(self):
+        """
+        Alterar um prato gera nova versão do cardápio e um novo ETag.
+        """
+        etag = self.client.get(self.url_dishes)['ETag']
+        version = CacheVersion.objects.get(pk='menu').version
+
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('dish-detail', args=[self.dish.id]), {'price': '30.00'}, format='json') # type: ignore
+        # A versão fica no banco: os outros workers também deixam de usar a entrada antiga
+        self.assertEqual(CacheVersion.objects.get(pk='menu').version, version + 1)
+
+        response = self.client.get(self.url_dishes, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data[0]['price'], '30.00') # type: ignore
+
+
+    def test_order_list_query_count_is_flat(self):
+        """
+        Listar pedidos não pode gerar uma query por pedido (N+1).
+        """
+        self.client.force_authenticate(user=self.admin) # type: ignore
+
+        def create_orders(count):
+            for _ in range(count):
+                order = Order.objects.create(total_price=25, table=self.table, user=self.user, status='queued')
+                OrderItem.objects.create(order=order, dish=self.dish, quantity=1, price=25)
+            project_orders()
+
+        def list_queries(params=None):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(self.url_orders, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries)
+
+        create_orders(1)
+        few, few_kitchen = list_queries(), list_queries({'mode': 'kitchen'})
+        create_orders(10)
+        self.assertEqual(list_queries(), few)
+        self.assertEqual(list_queries({'mode': 'kitchen'}), few_kitchen)
+
+
+    def test_order_list_cursor_pagination_and_fields(self):
+        """
+        Histórico paginado por cursor e com seleção de campos/expansão.
+        """
+        for _ in range(3):
+            order = Order.objects.create(total_price=25, table=self.table, user=self.user, status='completed')
+            OrderItem.objects.create(order=order, dish=self.dish, quantity=1, price=25)
+        self.client.force_authenticate(user=self.user) # type: ignore
+
+        response = self.client.get(self.url_orders, {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2) # type: ignore
+        self.assertIn('items', response.data['results'][0]) # type: ignore
+
+        response = self.client.get(response.data['next']) # type: ignore
+        self.assertEqual(len(response.data['results']), 1) # type: ignore
+        self.assertIsNone(response.data['next']) # type: ignore
+
+        response = self.client.get(self.url_orders, {'fields': 'id,status,table', 'expand': 'table'})
+        first = response.data['results'][0] # type: ignore
+        self.assertEqual(set(first), {'id', 'status', 'table'})
+        self.assertEqual(first['table'], {'id': self.table.id, 'number': 1}) # type: ignore
+
+    def test_order_list_date_range(self):
+        """
+        Filtros created_after/created_before limitam o período do histórico.
+        """
+        old = Order.objects.create(total_price=10, user=self.user, status='completed')
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=10))
+        recent = Order.objects.create(total_price=10, user=self.user, status='completed')
+        self.client.force_authenticate(user=self.user) # type: ignore
+
+        since = (timezone.localdate() - timedelta(days=1)).isoformat()
+        response = self.client.get(self.url_orders, {'created_after': since})
+        self.assertEqual([o['id'] for o in response.data['results']], [recent.id]) # type: ignore
+
+        response = self.client.get(self.url_orders, {'created_before': since})
+        self.assertEqual([o['id'] for o in response.data['results']], [old.id]) # type: ignore
+
+        response = self.client.get(self.url_orders, {'created_after': 'ontem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+    def test_order_status_transitions(self):
+        """
+        Máquina de estados: transições válidas passam, repetidas ou fora de ordem dão 409.
+        """
+        order = Order.objects.create(total_price=25, table=self.table, status='queued')
+        project_orders()
+        self.client.force_authenticate(user=self.admin) # type: ignore
+
+        def patch(action):
+            return self.client.patch(reverse(f'order-{action}', args=[order.id])) # type: ignore
+
+        # Não pode finalizar o que ainda não ficou pronto
+        response = patch('mark-completed')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['status'], 'queued') # type: ignore
+
+        self.assertEqual(patch('start-preparing').status_code, status.HTTP_200_OK)
+        self.assertEqual(patch('mark-ready').status_code, status.HTTP_200_OK)
+
+        # Segundo cozinheiro tocando no mesmo pedido
+        self.assertEqual(patch('mark-ready').status_code, status.HTTP_409_CONFLICT)
+
+        self.assertEqual(patch('mark-completed').status_code, status.HTTP_200_OK)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'completed')
+
+        response = self.client.patch(reverse('order-mark-ready', args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_order_transition_updates_only_status(self):
+        """
+        A transição é um único UPDATE que grava apenas a coluna status.
+        """
+        order = Order.objects.create(total_price=25, table=self.table, status='queued')
+        project_orders()
+        self.client.force_authenticate(user=self.admin) # type: ignore
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.patch(reverse('order-mark-ready', args=[order.id])) # type: ignore
+
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "restaurant_order"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "status"', updates[0])
+        self.assertNotIn('total_price', updates[0])
+
+
+    def test_kitchen_summary(self):
+        """
+        Quantidades consolidadas por prato e por mesa, atualizadas conforme os pedidos andam.
+        """
+        pizza = Dish.objects.create(name='Pizza', price=50, description='x')
+        old_order = Order.objects.create(total_price=75, table=self.table, status='preparing')
+        OrderItem.objects.create(order=old_order, dish=self.dish, quantity=1, price=25)
+        OrderItem.objects.create(order=old_order, dish=pizza, quantity=1, price=50)
+        Order.objects.create(total_price=25, table=self.table, status='ready') # Fora da fila
+        project_orders()
+
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        url = reverse('order-kitchen-summary')
+        self.client.get(url) # Carrega o quadro com a query agrupada
+        with self.assertNumQueries(1): # Fila sem mudanças: só a versão
+            self.client.get(url)
+
+        payload = {
+            "type": "dine-in",
+            "table": self.table.id, # type: ignore
+            "validation_code": "SEGREDO",
+            "items": [{"dish": self.dish.id, "quantity": 2}], # type: ignore
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url_orders, payload, format='json')
+
+        # O pedido incrementou a versão: versão + recarga agrupada
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        dishes = {d['name']: d for d in response.data['dishes']} # type: ignore
+        self.assertEqual(dishes['Hamburguer']['quantity'], 3)
+        self.assertEqual(dishes['Hamburguer']['orders'], 2)
+        self.assertEqual(dishes['Pizza']['quantity'], 1)
+        self.assertEqual(response.data['dishes'][0]['oldest_created_at'], old_order.created_at) # type: ignore
+        self.assertEqual(response.data['tables'][0]['number'], 1) # type: ignore
+        self.assertEqual(response.data['tables'][0]['orders'], 2) # type: ignore
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('order-mark-ready', args=[old_order.id])) # type: ignore
+
+        dishes = {d['name']: d for d in self.client.get(url).data['dishes']} # type: ignore
+        self.assertEqual(dishes['Hamburguer']['quantity'], 2)
+        self.assertNotIn('Pizza', dishes)
+
+        # Escrita de outro processo (outro worker, rebuild_active_orders): vista já na leitura seguinte
+        Order.objects.filter(status='queued').update(status='canceled')
+        call_command('rebuild_active_orders', stdout=StringIO())
+        self.assertEqual(self.client.get(url).data['dishes'], []) # type: ignore
+
+        self.client.force_authenticate(user=self.user) # type: ignore
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+    def test_bulk_transition(self):
+        """
+        Transição em lote por mesa ou por lista de IDs, com resultado por pedido.
+        """
+        ready = [Order.objects.create(total_price=25, table=self.table, status='ready') for _ in range(2)]
+        queued = Order.objects.create(total_price=25, table=self.table, status='queued')
+        Order.objects.create(total_price=25, table=self.table, status='completed') # Histórico da mesa
+        project_orders()
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        url = reverse('order-bulk-transition')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, {'status': 'completed', 'table': self.table.id}, format='json') # type: ignore
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2) # type: ignore
+        order_updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "restaurant_order"')]
+        self.assertEqual(len(order_updates), 1)
+        self.assertEqual(Order.objects.filter(status='completed').count(), 3)
+
+        response = self.client.post(url, {'status': 'ready', 'ids': [queued.id, ready[0].id, 9999]}, format='json') # type: ignore
+        self.assertEqual(response.data['results'], [ # type: ignore
+            {'id': queued.id, 'result': 'updated', 'status': 'ready'}, # type: ignore
+            {'id': ready[0].id, 'result': 'conflict', 'status': 'completed'}, # type: ignore
+            {'id': 9999, 'result': 'not_found'},
+        ])
+
+        response = self.client.post(url, {'status': 'ready', 'ids': [1], 'table': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+    def test_sales_rollups_and_reports(self):
+        """
+        Pedidos concluídos alimentam os resumos; o backfill reconstrói o mesmo resultado.
+        """
+        orders = []
+        for quantity in (1, 2):
+            order = Order.objects.create(total_price=25 * quantity, table=self.table, status='ready')
+            OrderItem.objects.create(order=order, dish=self.dish, quantity=quantity, price=25)
+            orders.append(order)
+        self.client.force_authenticate(user=self.admin) # type: ignore
+
+        self.client.patch(reverse('order-mark-completed', args=[orders[0].id])) # type: ignore
+        self.client.post(reverse('order-bulk-transition'), {'status': 'completed', 'ids': [orders[1].id]}, format='json') # type: ignore
+
+        def report(params):
+            response = self.client.get(reverse('report-sales'), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response.data
+
+        by_dish = report({'group_by': 'dish'})
+        self.assertEqual(len(by_dish), 1) # type: ignore
+        self.assertEqual(by_dish[0]['quantity'], 3) # type: ignore
+        self.assertEqual(by_dish[0]['revenue'], 75) # type: ignore
+
+        by_table = report({'group_by': 'table', 'granularity': 'hour'})
+        self.assertEqual(by_table[0]['orders'], 2) # type: ignore
+        self.assertEqual(by_table[0]['table__number'], 1) # type: ignore
+
+        # Reconstrução em lotes de 1 pedido chega aos mesmos totais
+        call_command('backfill_sales_rollups', chunk_size=1, stdout=StringIO())
+        self.assertEqual(DishSalesRollup.objects.count(), 2) # Uma linha parcial por lote
+        self.assertEqual(report({'group_by': 'dish'})[0]['quantity'], 3) # type: ignore
+
+        throughput = self.client.get(reverse('report-throughput')).data
+        self.assertEqual(throughput[0]['orders'], 2) # type: ignore
+        self.assertEqual(str(throughput[0]['average_ticket']), '37.50') # type: ignore
+
+        self.assertEqual(self.client.get(reverse('report-sales'), {'group_by': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=self.user) # type: ignore
+        self.assertEqual(self.client.get(reverse('report-sales')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+    def test_order_export_streaming(self):
+        """
+        Exportação em CSV/NDJSON por streaming, atravessando vários lotes.
+        """
+        for quantity in range(1, 4):
+            order = Order.objects.create(total_price=25 * quantity, table=self.table, status='completed')
+            OrderItem.objects.create(order=order, dish=self.dish, quantity=quantity, price=25)
+        Order.objects.create(total_price=0, status='canceled') # Pedido sem itens
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        url = reverse('order-export')
+
+        response = self.client.get(url, {'output': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming) # type: ignore
+        lines = b''.join(response.streaming_content).decode().splitlines() # type: ignore
+        self.assertTrue(lines[0].startswith('order_id,created_at'))
+        self.assertEqual(len(lines), 5) # Cabeçalho + 3 itens + pedido sem itens
+
+        response = self.client.get(url, {'output': 'ndjson', 'status': 'completed'})
+        orders = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()] # type: ignore
+        self.assertEqual([o['items'][0]['quantity'] for o in orders], [1, 2, 3])
+        self.assertEqual(orders[0]['table_number'], 1)
+
+        # Comando de gerenciamento com lotes de 1 pedido gera a mesma saída
+        out = StringIO()
+        call_command('export_orders', format='ndjson', status='completed', chunk_size=1, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+        self.client.force_authenticate(user=self.user) # type: ignore
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+    def _test_idempotent_order_create(self):
+        self.client.force_authenticate(user=self.user) # type: ignore
+        payload = {
+            "type": "dine-in",
+            "table": self.table.id, # type: ignore
+            "validation_code": "SEGREDO",
+            "items": [{"dish": self.dish.id, "quantity": 1}], # type: ignore
+        }
+        headers = {'Idempotency-Key': 'a3f1c2'}
+
+        first = self.client.post(self.url_orders, payload, format='json', headers=headers)
+        replay = self.client.post(self.url_orders, payload, format='json', headers=headers)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+        # Mesma chave com outro conteúdo
+        payload['items'][0]['quantity'] = 5 # type: ignore
+        response = self.client.post(self.url_orders, payload, format='json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        # Sem cabeçalho, cada POST cria um pedido
+        self.client.post(self.url_orders, payload, format='json')
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_idempotent_order_create_database_store(self):
+        """
+        Idempotency-Key: repetições devolvem a resposta gravada sem criar outro pedido.
+        """
+        self._test_idempotent_order_create()
+
+    @override_settings(IDEMPOTENCY_STORE='restaurant.idempotency.CacheIdempotencyStore')
+    def test_idempotent_order_create_cache_store(self):
+        """
+        Mesmo comportamento com o backend de cache.
+        """
+        caches['idempotency'].clear()
+        self._test_idempotent_order_create()
+
+    def test_idempotent_order_create_saves_response_atomically(self):
+        """
+        Falha ao gravar a resposta desfaz o pedido: nunca fica um pedido sem resposta gravada.
+        """
+        self.client.force_authenticate(user=self.user) # type: ignore
+        payload = {"type": "takeaway", "items": [{"dish": self.dish.id, "quantity": 1}]} # type: ignore
+        headers = {'Idempotency-Key': 'k2'}
+
+        with mock.patch.object(type(get_idempotency_store()), 'save', side_effect=RuntimeError('queda')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(self.url_orders, payload, format='json', headers=headers)
+        self.assertEqual(Order.objects.count(), 0)
+
+        # A chave foi liberada: a nova tentativa cria o pedido e grava a resposta
+        response = self.client.post(self.url_orders, payload, format='json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, status.HTTP_201_CREATED)
+
+    def test_idempotent_order_create_in_progress(self):
+        """
+        Chave reservada por uma requisição em andamento: a duplicata recebe 409 na hora e não insere nada.
+        """
+        self.client.force_authenticate(user=self.user) # type: ignore
+        payload = {"type": "takeaway", "items": [{"dish": self.dish.id, "quantity": 1}]} # type: ignore
+        key = hashlib.sha256(f'order:{self.user.pk}:k1'.encode()).hexdigest()
+        get_idempotency_store().acquire(key, 'outra-requisicao')
+
+        with mock.patch('restaurant.idempotency.time.sleep') as sleep:
+            response = self.client.post(self.url_orders, payload, format='json', headers={'Idempotency-Key': 'k1'})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Retry-After'], '1')
+        sleep.assert_not_called()
+        self.assertEqual(Order.objects.count(), 0)
+
+
+    def test_dine_in_validation_uses_table_cache(self):
+        """
+        Validar a mesa não consulta o banco, e um QR Code trocado vale na hora.
+        """
+        payload = {
+            "type": "dine-in",
+            "table": self.table.id, # type: ignore
+            "validation_code": "SEGREDO",
+            "items": [{"dish": self.dish.id, "quantity": 1}], # type: ignore
+        }
+        self.client.post(self.url_orders, payload, format='json') # Aquece o cache
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url_orders, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "restaurant_table"' in q['sql']])
+
+        # Admin troca o código da mesa
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        with self.captureOnCommitCallbacks(execute=True):
+            url = reverse('table-detail', args=[self.table.id]) # type: ignore
+            self.client.patch(url, {'validation_code': 'NOVO'}, format='json')
+        self.client.force_authenticate(user=None) # type: ignore
+
+        response = self.client.post(self.url_orders, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        payload['validation_code'] = 'NOVO'
+        response = self.client.post(self.url_orders, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+    @override_settings(METRICS_ENABLED=True, METRICS_SERVER_TIMING=True, METRICS_TOKEN='segredo')
+    def test_metrics_endpoint(self):
+        """
+        Latência e queries por view em /metrics, Server-Timing e taxa de acerto dos caches.
+        """
+        get_metrics_registry().reset()
+        self.client.force_authenticate(user=self.user) # type: ignore
+        response = self.client.get(self.url_orders)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.client.get(self.url_dishes)
+        self.client.get(self.url_dishes)
+        self.assertEqual(get_metrics_registry().cache_ratio('menu'), 0.5)
+
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer segredo'})
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="order-list",method="GET"} 1', body)
+        self.assertIn('http_request_db_queries_count{view="dish-list",method="GET"} 2', body)
+        self.assertIn('app_cache_requests_total{cache="menu",result="hit"} 1', body)
+        self.assertNotIn('view="metrics"', body)
+
+        # Métodos fora da lista não viram rótulos novos
+        self.client.generic('BREW', self.url_dishes)
+        body = self.client.get('/metrics', headers={'Authorization': 'Bearer segredo'}).content.decode()
+        self.assertIn('view="dish-list",method="other"', body)
+        self.assertNotIn('BREW', body)
+
+        # Sem token, fora do DEBUG, o endpoint não existe
+        with self.settings(METRICS_TOKEN=None, DEBUG=False):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_disabled(self):
+        get_metrics_registry().reset()
+        response = self.client.get(self.url_dishes)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+
+
+    def test_query_audit_flags_n_plus_one(self):
+        """
+        A auditoria acusa a mesma query repetida (N+1) e o orçamento estourado da viewset.
+        """
+        dishes = [Dish.objects.create(name=f'Prato {i}', price=10, description='x') for i in range(3)]
+        with audit_queries() as audit:
+            for dish in dishes:
+                Dish.objects.get(pk=dish.pk)
+        with self.assertRaises(QueryBudgetExceeded):
+            audit.assert_no_repeats()
+
+        # Roda também fora do QueryAuditRunner; o relatório separado não polui o da suíte
+        middleware = ['setup.querycheck.QueryAuditMiddleware'] + [
+            name for name in settings.MIDDLEWARE if name != 'setup.querycheck.QueryAuditMiddleware'
+        ]
+        self.client.force_authenticate(user=self.user) # type: ignore
+        with override_settings(MIDDLEWARE=middleware), \
+                mock.patch.object(querycheck, 'report', querycheck.AuditReport()), \
+                mock.patch.object(OrderViewSet, 'query_budgets', {'list': 0}):
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'GET order-list'):
+                self.client.get(self.url_orders)
+
+
+    def test_active_orders_projection(self):
+        """
+        Cozinha e garçons leem a projeção ActiveOrder, mantida pela criação e pelas transições.
+        """
+        Order.objects.create(total_price=25, table=self.table, status='completed') # Histórico
+        payload = {
+            "type": "dine-in",
+            "table": self.table.id, # type: ignore
+            "validation_code": "SEGREDO",
+            "items": [{"dish": self.dish.id, "quantity": 2}], # type: ignore
+        }
+        order_id = self.client.post(self.url_orders, payload, format='json').data['id'] # type: ignore
+
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        with self.assertNumQueries(1):
+            kitchen = self.client.get(self.url_orders, {'mode': 'kitchen', 'expand': 'table'}).data
+        self.assertEqual([order['id'] for order in kitchen], [order_id]) # type: ignore
+        self.assertEqual(kitchen[0]['items'][0]['quantity'], 2) # type: ignore
+        self.assertEqual(kitchen[0]['table'], {'id': self.table.id, 'number': 1}) # type: ignore
+
+        self.client.patch(reverse('order-mark-ready', args=[order_id]))
+        self.assertEqual(self.client.get(self.url_orders, {'mode': 'kitchen'}).data, [])
+        waiter = self.client.get(self.url_orders, {'mode': 'waiter', 'fields': 'id,status'}).data
+        self.assertEqual(waiter, [{'id': order_id, 'status': 'ready'}])
+
+        self.client.patch(reverse('order-mark-completed', args=[order_id]))
+        self.assertEqual(ActiveOrder.objects.count(), 0)
+
+        # Escrita fora da API: o comando reconstrói a projeção
+        Order.objects.filter(pk=order_id).update(status='preparing')
+        call_command('rebuild_active_orders', stdout=StringIO())
+        self.assertEqual(list(ActiveOrder.objects.values_list('order_id', 'status')), [(order_id, 'preparing')])
+
+
+    def test_async_menu_matches_sync(self):
+        """
+        O cardápio assíncrono devolve o mesmo conteúdo e ETag do DishViewSet.
+        """
+        Dish.objects.create(name='Suco', price=8, description='Laranja')
+        # Cada um monta o cardápio a partir do banco, com o cache vazio
+        response = self.client.get(reverse('menu-async'))
+        get_menu_cache().clear()
+        sync_response = self.client.get(self.url_dishes)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual(response['ETag'], sync_response['ETag'])
+
+        response = self.client.get(reverse('menu-async'), headers={'If-None-Match': sync_response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(reverse('menu-async-detail', args=[self.dish.id])) # type: ignore
+        self.assertEqual(response.json()['name'], 'Hamburguer')
+        self.assertEqual(self.client.get(reverse('menu-async-detail', args=[9999])).status_code, 404)
+
+    async def test_order_status_long_poll(self):
+        """
+        Status do pedido pelo dono e long-poll que responde quando o status muda.
+        """
+        order = await Order.objects.acreate(total_price=25, table=self.table, user=self.user, status='queued')
+        token = await Token.objects.acreate(user=self.user)
+        headers = {'Authorization': f'Token {token.key}'}
+        wait_url = reverse('order-wait', args=[order.pk])
+
+        response = await self.async_client.get(reverse('order-status', args=[order.pk]), headers=headers)
+        self.assertEqual(response.json(), {'id': order.pk, 'status': 'queued'})
+        response = await self.async_client.get(reverse('order-status', args=[order.pk]))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Cliente já desatualizado: responde na hora
+        response = await self.async_client.get(wait_url, {'status': 'pending'}, headers=headers)
+        self.assertEqual(response.json(), {'id': order.pk, 'status': 'queued', 'changed': True})
+
+        # Parado até a transição chegar pelo broker
+        waiting = asyncio.ensure_future(self.async_client.get(wait_url, {'timeout': 5}, headers=headers))
+        await asyncio.sleep(0.2)
+        self.assertFalse(waiting.done())
+        get_broker().publish('order.removed', {'id': order.pk, 'status': 'ready'})
+        response = await asyncio.wait_for(waiting, timeout=2)
+        self.assertEqual(response.json(), {'id': order.pk, 'status': 'ready', 'changed': True})
+
+        # Sem transição: devolve o status atual ao fim do timeout
+        response = await self.async_client.get(wait_url, {'timeout': 0}, headers=headers)
+        self.assertEqual(response.json(), {'id': order.pk, 'status': 'queued', 'changed': False})
+
+
+    def test_archive_old_orders(self):
+        """
+        Pedidos finalizados antigos vão para o arquivo; histórico, detalhe e exportação leem as duas tabelas.
+        """
+        now = timezone.now()
+        ages = {'completed': [40, 50, 60], 'canceled': [45], 'queued': [70]}
+        for order_status, days_list in ages.items():
+            for days in days_list:
+                order = Order.objects.create(total_price=25, table=self.table, user=self.user, status=order_status)
+                OrderItem.objects.create(order=order, dish=self.dish, quantity=1, price=25)
+                Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=days))
+        recent = Order.objects.create(total_price=25, table=self.table, user=self.user, status='completed')
+
+        call_command('archive_orders', days=30, batch_size=2, pause=0, stdout=StringIO())
+        self.assertEqual(ArchivedOrder.objects.count(), 4)
+        self.assertEqual(ArchivedOrderItem.objects.count(), 4)
+        self.assertEqual(set(Order.objects.values_list('status', flat=True)), {'completed', 'queued'}) # recente + em andamento
+
+        # Histórico paginado atravessa as duas tabelas em ordem, sem repetir pedidos
+        self.client.force_authenticate(user=self.user) # type: ignore
+        seen, url, params = [], self.url_orders, {'page_size': 2}
+        while url:
+            response = self.client.get(url, params)
+            seen += [(order['id'], order['created_at']) for order in response.data['results']] # type: ignore
+            url, params = response.data['next'], None # type: ignore
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(seen[0][0], recent.id) # type: ignore
+        self.assertEqual(seen, sorted(seen, key=lambda order: order[1], reverse=True))
+
+        archived = ArchivedOrder.objects.order_by('created_at').first()
+        response = self.client.get(reverse('order-detail', args=[archived.id])) # type: ignore
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['items'][0]['dish'], self.dish.id) # type: ignore
+
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        response = self.client.get(reverse('order-export'), {'output': 'ndjson'})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 6) # type: ignore
+
+        # O backfill dos resumos soma também os pedidos arquivados (3 concluídos + o recente)
+        call_command('backfill_sales_rollups', stdout=StringIO())
+        response = self.client.get(reverse('report-sales'), {'group_by': 'dish'})
+        self.assertEqual(sum(row['quantity'] for row in response.data), 3) # type: ignore
+        self.assertEqual(sum(OrderSalesRollup.objects.values_list('orders', flat=True)), 4)
+
+
+    def test_compact_order_payloads(self):
+        """
+        JSON compacto e MessagePack: itens em tuplas e status em código, na ida e na volta.
+        """
+        self.client.force_authenticate(user=self.user) # type: ignore
+        payload = {
+            'type': 'dine-in', 'table': self.table.id, 'validation_code': 'SEGREDO', # type: ignore
+            'items': [[self.dish.id, 2, 'Sem cebola'], [self.dish.id, 1]], # type: ignore
+        }
+        response = self.client.post(
+            self.url_orders, msgpack.packb(payload), content_type=MSGPACK_MEDIA_TYPE, HTTP_ACCEPT=MSGPACK_MEDIA_TYPE,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['Content-Type'], MSGPACK_MEDIA_TYPE)
+        created = msgpack.unpackb(response.content)
+        self.assertEqual(created['items'], [[self.dish.id, 2, 'Sem cebola'], [self.dish.id, 1]]) # type: ignore
+        self.assertEqual(created['status'], STATUS_CODES['queued'])
+        self.assertIsInstance(created['created_at'], int)
+
+        full = self.client.get(self.url_orders)
+        compact = self.client.get(self.url_orders, HTTP_ACCEPT=COMPACT_MEDIA_TYPE)
+        self.assertEqual(compact.json()['results'][0], created)
+        self.assertLess(len(compact.content), len(full.content))
+
+        # A cozinha lê a projeção ActiveOrder, no mesmo formato
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        kitchen = self.client.get(self.url_orders, {'mode': 'kitchen', 'format': 'compact'})
+        self.assertEqual(kitchen.json()[0]['items'], created['items'])
+
+        # Compressão: brotli quando aceito, gzip como alternativa
+        response = self.client.get(self.url_orders, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(json.loads(brotli.decompress(response.content)), full.json())
+        response = self.client.get(self.url_orders, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+        # Credenciais na resposta: nada de brotli (sem proteção contra BREACH), só o gzip do Django
+        middleware = CompressionMiddleware(lambda request: HttpResponse('{"token": "%s"}' % ('x' * 500)))
+        request = RequestFactory().post(reverse('login'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(middleware(request)['Content-Encoding'], 'gzip')
+        request = RequestFactory().get(self.url_orders, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(middleware(request)['Content-Encoding'], 'br')
+
+        # MessagePack inválido (chave de mapa não hashável, bytes soltos): 400, não 500
+        for body in (msgpack.packb({(1, 2): 'x'}), b'\xc1'):
+            response = self.client.post(self.url_orders, body, content_type=MSGPACK_MEDIA_TYPE)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seed_restaurant_builds_projections(self):
+        """
+        Os dados sintéticos já saem com a projeção da cozinha e os resumos de vendas montados.
+        """
+        call_command('seed_restaurant', dishes=5, tables=2, customers=3, orders=40, active=4, days=10, stdout=StringIO())
+
+        self.assertEqual(
+            set(ActiveOrder.objects.values_list('order_id', flat=True)),
+            set(Order.objects.filter(status__in=['queued', 'preparing', 'ready']).values_list('pk', flat=True)),
+        )
+        self.assertEqual(
+            sum(OrderSalesRollup.objects.values_list('orders', flat=True)),
+            Order.objects.filter(status='completed').count(),
+        )
+
+    def test_benchmark_requires_baseline(self):
+        """
+        Sem arquivo de baseline o benchmark falha antes de medir, a menos que vá gravá-la.
+        """
+        with self.assertRaisesMessage(CommandError, '--update-baseline'):
+            call_command('benchmark', baseline='/nonexistent/baseline.json', requests=1, stdout=StringIO())
+
+    def test_row_reader_matches_serializers(self):
+        """
+        As listagens montadas pelo RowReader saem iguais às dos serializers do DRF.
+        """
+        with_table = Order.objects.create(total_price=50, table=self.table, user=self.user, status='queued')
+        OrderItem.objects.create(order=with_table, dish=self.dish, quantity=2, price=25, observations='Sem cebola')
+        takeaway = Order.objects.create(total_price=25, type='takeaway', user=self.user, status='completed')
+        OrderItem.objects.create(order=takeaway, dish=self.dish, quantity=1, price=25, observations=None)
+        Order.objects.filter(pk=takeaway.pk).update(created_at=timezone.now() - timedelta(days=120))
+        call_command('archive_orders', days=90, pause=0, stdout=StringIO())
+        self.assertEqual(ArchivedOrder.objects.count(), 1)
+
+        self.client.force_authenticate(user=self.user) # type: ignore
+        for params in ({}, {'expand': 'table'}, {'fields': 'id,status'}):
+            response = self.client.get(self.url_orders, params)
+            request = Request(APIRequestFactory().get(self.url_orders, params)) # ?fields/?expand para o serializer
+            instances = [
+                with_table,
+                ArchivedOrder.objects.prefetch_related('items').get(pk=takeaway.pk),
+            ]
+            expected = OrderSerializer(instances, many=True, context={'request': request}).data
+            self.assertEqual(response.data['results'], expected) # type: ignore
+
+        self.client.force_authenticate(user=self.admin) # type: ignore
+        self.assertEqual(self.client.get(reverse('table-list')).data, TableSerializer(Table.objects.all(), many=True).data)
+        self.assertEqual(self.client.get(self.url_dishes).json(), DishSerializer(Dish.objects.all(), many=True).data)
+
+class ReplicaRoutingTests(APITransactionTestCase):
+    """
+    Sem a transação por teste, a réplica (espelho do banco de teste) enxerga o que foi gravado.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cliente', password='123', email='cliente@example.com', type='customer')
+        self.admin = User.objects.create_superuser(username='admin', password='123', email='admin@example.com', type='admin')
+        self.table = Table.objects.create(number=1, validation_code='SEGREDO')
+        self.dish = Dish.objects.create(name='Hamburguer', price=25.00, description='Bom')
+        get_menu_cache().clear()
+        caches[settings.REPLICA_STICKY_CACHE].clear()
+        get_table_codes().reset()
+
+    def _reads(self, method, *args, **kwargs):
+        """
+        Faz a requisição e devolve a resposta e quantas queries cada banco recebeu.
+        """
+        with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(*args, **kwargs)
+        return response, len(primary), len(replica)
+
+    def test_history_reads_replica_until_client_writes(self):
+        Order.objects.create(total_price=25, table=self.table, user=self.user, status='completed')
+        self.client.force_authenticate(user=self.user) # type: ignore
+
+        response, primary, replica = self._reads('get', reverse('order-list'))
+        self.assertEqual(len(response.data['results']), 1) # type: ignore
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        payload = {
+            'type': 'dine-in', 'table': self.table.id, 'validation_code': 'SEGREDO', # type: ignore
+            'items': [{'dish': self.dish.id, 'quantity': 1}], # type: ignore
+        }
+        response, primary, replica = self._reads('post', reverse('order-list'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replica, 0)
+
+        # Logo após escrever, o cliente lê do principal e vê o pedido novo. A marca tem cache
+        # próprio: limpar o do cardápio (ex.: um deploy) não a apaga
+        get_menu_cache().clear()
+        response, primary, replica = self._reads('get', reverse('order-list'))
+        self.assertEqual(len(response.data['results']), 2) # type: ignore
+        self.assertEqual(replica, 0)
+
+        caches[settings.REPLICA_STICKY_CACHE].clear() # Fim da janela de aderência
+        response, primary, replica = self._reads('get', reverse('order-detail', args=[response.data['results'][0]['id']])) # type: ignore
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(primary, 0)
+
+    @override_settings(DEBUG=True)
+    def test_middleware_chain_stays_async(self):
+        """
+        Sob ASGI nenhum middleware obriga a pilha a rodar numa thread (o Django avisaria no log).
+        """
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    async def test_async_write_sticks_to_primary(self):
+        token = await Token.objects.acreate(user=self.user)
+        payload = {'type': 'takeaway', 'items': [{'dish': self.dish.id, 'quantity': 1}]} # type: ignore
+        response = await self.async_client.post(
+            reverse('order-list'), payload, content_type='application/json',
+            headers={'Authorization': f'Token {token.key}'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await sync_to_async(is_sticky)(self.user))
+
+    def test_realtime_screens_and_reports(self):
+        self.client.force_authenticate(user=self.admin) # type: ignore
+
+        # A cozinha lê sempre o principal; relatórios e exportação, a réplica
+        _, primary, replica = self._reads('get', reverse('order-list'), {'mode': 'kitchen'})
+        self.assertEqual((primary, replica), (1, 0))
+        _, primary, replica = self._reads('get', reverse('report-sales'))
+        self.assertEqual((primary, replica), (0, 1))
+
+        Order.objects.create(total_price=25, table=self.table, user=self.user, status='completed')
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(reverse('order-export'), {'output': 'ndjson'})
+            lines = b''.join(response.streaming_content).splitlines() # type: ignore
+        self.assertEqual(len(lines), 1)
+        self.assertGreater(len(replica), 0)
+
@@ -1,5 +1,8 @@
 from rest_framework.routers import DefaultRouter
-from restaurant.views import DishViewSet, TableViewSet, OrderViewSet
+from restaurant.views import (
+    DishViewSet, TableViewSet, OrderViewSet, ReportViewSet, dish_async, kitchen_stream, menu_async, order_status,
+    order_wait,
+)
 from django.urls import path, include
 
 
@@ -7,7 +10,15 @@ router = DefaultRouter()
 router.register(r'dishes', DishViewSet, basename='dish')
 router.register(r'tables', TableViewSet, basename='table')
 router.register(r'orders', OrderViewSet, basename='order')
+router.register(r'reports', ReportViewSet, basename='report')
 
 urlpatterns = [
+    # Precisa vir antes do router, senão 'stream' casa com /orders/{pk}/
+    path('orders/stream/', kitchen_stream, name='order-stream'),
+    # Leituras assíncronas (ASGI): cardápio, status do pedido e long-poll
+    path('orders/<int:pk>/status/', order_status, name='order-status'),
+    path('orders/<int:pk>/wait/', order_wait, name='order-wait'),
+    path('menu/', menu_async, name='menu-async'),
+    path('menu/<int:pk>/', dish_async, name='menu-async-detail'),
     path('', include(router.urls), name='restaurant'),
 ]
\ No newline at end of file
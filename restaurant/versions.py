@@ -0,0 +1,49 @@
+"""
+Contadores de versão compartilhados entre workers, guardados no banco (CacheVersion).
+
+Os caches que vivem na memória de cada processo (códigos das mesas, cardápio em
+LocMem) guardam junto a versão com que foram montados e comparam com a do banco
+a cada uso: uma query por chave primária. Um contador no cache LocMem não serviria,
+porque cada worker teria o seu e nunca veria o incremento feito por outro.
+
+bump_version() roda dentro da transação de quem escreve, então a versão nova
+fica visível para os outros workers junto com os dados novos, no commit.
+"""
+import time
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+from restaurant.models import CacheVersion
+
+
+def _versions():
+    # Sempre no primário: uma réplica atrasada devolveria uma versão antiga
+    return CacheVersion.objects.using(DEFAULT_DB_ALIAS)
+
+
+def _initial():
+    # Começa de um valor baseado no relógio: se a linha for apagada, a nova versão
+    # não colide com entradas antigas ainda guardadas nos caches
+    return {'version': time.time_ns()}
+
+
+def get_version(name):
+    version = _versions().filter(pk=name).values_list('version', flat=True).first()
+    if version is None:
+        version = _versions().get_or_create(name=name, defaults=_initial())[0].version
+    return version
+
+
+async def aget_version(name):
+    version = await _versions().filter(pk=name).values_list('version', flat=True).afirst()
+    if version is None:
+        version = (await _versions().aget_or_create(name=name, defaults=_initial()))[0].version
+    return version
+
+
+def bump_version(name):
+    """
+    Incrementa a versão. Sem a linha, não faz nada: a próxima leitura cria uma versão nova.
+    """
+    _versions().filter(pk=name).update(version=F('version') + 1)
@@ -1,17 +1,56 @@
+import asyncio
+from datetime import datetime, time as datetime_time, timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Prefetch, Sum, Value
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_GET
 from rest_framework import viewsets, status
-from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework.exceptions import AuthenticationFailed, NotFound, ValidationError, PermissionDenied
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from restaurant.models import Dish, Table, Order, OrderItem
-from restaurant.serializers import DishSerializer, TableSerializer, OrderSerializer, OrderItemSerializer
+from restaurant.active import active_order_payloads, activate_order, refresh_active_orders, sync_active_orders
+from restaurant.archive import OrderHistory
+from restaurant.cache import aget_menu, get_menu
+from restaurant.compact import COMPACT_PARSER_CLASSES, COMPACT_RENDERER_CLASSES
+from restaurant.events import format_sse, get_broker, publish_order_event
+from restaurant.exports import EXPORT_FORMATS, aiter_chunks, export_orders
+from restaurant.idempotency import IdempotentCreateMixin
+from restaurant.kitchen import bump_kitchen_version, changes_kitchen, get_kitchen_board
+from restaurant.models import (
+    KITCHEN_STATUSES, ORDER_TRANSITIONS, ArchivedOrder, ArchivedOrderItem, Dish, DishSalesRollup, Order, OrderItem, OrderSalesRollup, Table,
+)
+from restaurant.pagination import OrderCursorPagination
+from restaurant.readers import get_reader
+from restaurant.reports import record_completed_orders
+from restaurant.serializers import (
+    BulkTransitionSerializer, DishSerializer, TableSerializer, OrderSerializer, OrderItemSerializer, requested_expansions,
+    requested_fields,
+)
+from setup.routers import ReplicaReadMixin
+from users.authentication import CachedTokenAuthentication
 
 
 class DishViewSet(viewsets.ModelViewSet):
     queryset = Dish.objects.all()
     serializer_class = DishSerializer
+    # Máximo de queries por ação, conferido nos testes (setup/querycheck.py)
+    query_budgets = {'list': 2, 'retrieve': 2, 'create': 1, 'update': 2, 'partial_update': 2}
+    # list/retrieve: a versão do cardápio (restaurant/versions.py) e, se ela mudou, o cardápio.
+    # Sem leituras na réplica: o cardápio só vai ao banco quando a versão muda, e remontá-lo
+    # de uma réplica atrasada deixaria a versão nova em cache com os pratos antigos.
     
     def get_permissions(self):
         """
@@ -22,15 +61,65 @@ class DishViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    def _get_menu(self):
+        reader = get_reader(DishSerializer)
+        return get_menu(lambda: reader.build(reader.values(self.filter_queryset(self.get_queryset()))))
+
+    def _cached_response(self, request, etag, data):
+        # GET condicional: se o cliente já tem esta versão, responde 304 sem corpo
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        return Response(data, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+    def list(self, request, *args, **kwargs):
+        """
+        Cardápio servido do cache versionado (ver restaurant/cache.py).
+        """
+        menu = self._get_menu()
+        return self._cached_response(request, menu['etag'], menu['items'])
+
+    def retrieve(self, request, *args, **kwargs):
+        menu = self._get_menu()
+        entry = menu['by_id'].get(str(kwargs[self.lookup_field]))
+        if entry is None:
+            raise NotFound()
+        etag, item = entry
+        return self._cached_response(request, etag, item)
+
 
 class TableViewSet(viewsets.ModelViewSet):
     queryset = Table.objects.all()
     serializer_class = TableSerializer
     permission_classes = [IsAdminUser]
+    query_budgets = {'list': 1, 'retrieve': 1, 'create': 4, 'update': 4, 'partial_update': 4}
 
+    def list(self, request, *args, **kwargs):
+        reader = get_reader(TableSerializer)
+        return Response(reader.build(reader.values(self.filter_queryset(self.get_queryset()))))
 
-class OrderViewSet(viewsets.ModelViewSet):
+
+class OrderViewSet(ReplicaReadMixin, IdempotentCreateMixin, viewsets.ModelViewSet):
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
+    # list/retrieve leem também os arquivados; a criação inclui reservar/gravar o
+    # Idempotency-Key, a versão dos códigos das mesas, a projeção ActiveOrder e a
+    # versão do quadro da cozinha; mark_completed inclui os resumos de vendas
+    query_budgets = {
+        'list': 4,
+        'retrieve': 3,
+        'create': 12,
+        'start_preparing': 2,
+        'mark_ready': 3,
+        'mark_completed': 8,
+        'bulk_transition': 7,
+        'kitchen_summary': 2, # Versão + recarga quando a fila mudou
+    }
+    # Histórico, detalhe e exportação podem ler da réplica (setup/routers.py)
+    replica_actions = {'list', 'retrieve', 'export'}
+    # Representação compacta negociada por Accept/Content-Type (restaurant/compact.py)
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, *COMPACT_RENDERER_CLASSES]
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, *COMPACT_PARSER_CLASSES]
     # Permissão base aberta, pois anônimos podem criar pedidos na mesa.
     # Filtramos a segurança dentro do get_queryset e perform_create.
     permission_classes = [AllowAny]
@@ -43,8 +132,21 @@ class OrderViewSet(viewsets.ModelViewSet):
         3. Cliente Logado: Vê seus pedidos.
         4. Anônimo: Não vê nada (segurança).
         """
+        return self._scoped_queryset(Order.objects.all(), OrderItem)
+
+    def _scoped_queryset(self, queryset, item_model):
+        """
+        Aplica as regras de get_queryset a Order ou a ArchivedOrder (pedidos arquivados).
+        """
         user = self.request.user
-        queryset = Order.objects.all()
+        # Carrega itens, pratos, mesas e usuários em um número fixo de queries,
+        # independente de quantos pedidos a listagem retornar (sem N+1).
+        queryset = queryset.select_related('user', 'table')
+        fields = requested_fields(self.request)
+        if fields is None or 'items' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('items', queryset=item_model.objects.select_related('dish'))
+            )
 
         # Cenário 1: Tela da Cozinha
         # URL: /api/orders/?mode=kitchen
@@ -54,22 +156,116 @@ class OrderViewSet(viewsets.ModelViewSet):
             
             # FIFO: Ordena por data (mais antigo primeiro) e filtra status relevantes
             return queryset.filter(
-                status__in=['queued', 'preparing']
+                status__in=KITCHEN_STATUSES
             ).order_by('created_at')
 
         # Cenário 2: Funcionários (Garçons/Gerentes) veem tudo
         if user.is_staff:
-            return queryset
+            return self._filter_created_at(queryset)
 
         # Cenário 3: Cliente Logado vê histórico próprio
 
         if user.is_authenticated:
-            return queryset.filter(user=user)
+            return self._filter_created_at(queryset.filter(user=user))
 
         # Cenário 4: Anônimo (Segurança)
         # Se não está logado, não pode listar pedidos para evitar vazamento de dados.
         return queryset.none()
 
+    def _parse_date_param(self, name, end_of_day=False):
+        """
+        Aceita data (2024-05-01) ou data/hora ISO (2024-05-01T12:00:00Z).
+        Para datas, end_of_day=True usa o início do dia seguinte (limite exclusivo).
+        """
+        value = self.request.query_params.get(name) # type: ignore
+        if not value:
+            return None, False
+
+        try:
+            parsed = parse_datetime(value)
+            exclusive = False
+            if parsed is None:
+                day = parse_date(value)
+                if day is None:
+                    raise ValueError
+                if end_of_day:
+                    day += timedelta(days=1)
+                    exclusive = True
+                parsed = datetime.combine(day, datetime_time.min)
+        except ValueError:
+            raise ValidationError({name: "Data inválida. Use AAAA-MM-DD ou data/hora ISO 8601."})
+
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed, exclusive
+
+    def _filter_created_at(self, queryset):
+        """
+        Filtro por período: ?created_after=2024-05-01&created_before=2024-05-31
+        """
+        start, _ = self._parse_date_param('created_after')
+        end, exclusive = self._parse_date_param('created_before', end_of_day=True)
+
+        if start is not None:
+            queryset = queryset.filter(created_at__gte=start)
+        if end is not None:
+            queryset = queryset.filter(created_at__lt=end) if exclusive else queryset.filter(created_at__lte=end)
+        return queryset
+
+    # Telas em tempo real: ?mode= -> status lidos da projeção ActiveOrder
+    ACTIVE_MODES = {
+        'kitchen': KITCHEN_STATUSES, # Fila da cozinha
+        'waiter': ['ready'], # Pedidos prontos aguardando o garçom
+    }
+
+    def use_replica(self, request):
+        # As telas em tempo real precisam do estado atual, não do que já foi replicado
+        if request.query_params.get('mode') in self.ACTIVE_MODES:
+            return False
+        return super().use_replica(request)
+
+    def list(self, request, *args, **kwargs):
+        """
+        ?mode=kitchen e ?mode=waiter leem só os pedidos em andamento (restaurant/active.py),
+        inteiros e em ordem FIFO, sem tocar no histórico de Order.
+        """
+        statuses = self.ACTIVE_MODES.get(request.query_params.get('mode'))
+        if statuses is not None:
+            if not request.user.is_staff:
+                raise PermissionDenied("Apenas funcionários acessam a visão da cozinha.")
+            return Response(active_order_payloads(statuses, request))
+
+        # Histórico: pedidos recentes e arquivados na mesma paginação (ver restaurant/archive.py),
+        # lidos com .values() e montados pelo RowReader (restaurant/readers.py), sem instanciar serializers
+        fields = requested_fields(request)
+        reader = get_reader(
+            OrderSerializer, frozenset(fields) if fields is not None else None, frozenset(requested_expansions(request))
+        )
+        ordering = [field.lstrip('-') for field in self.pagination_class.ordering] # type: ignore
+        history = OrderHistory(
+            reader.values(self.filter_queryset(self.get_queryset()), *ordering, archived=Value(False)),
+            reader.values(
+                self._scoped_queryset(ArchivedOrder.objects.all(), ArchivedOrderItem), *ordering, archived=Value(True)
+            ),
+        )
+        page = self.paginate_queryset(history)
+
+        # Cada tabela de origem tem a sua tabela de itens
+        serialized = {
+            archived: iter(reader.serialize([row for row in page if row['archived'] == archived], model))
+            for archived, model in ((False, Order), (True, ArchivedOrder))
+        }
+        return self.get_paginated_response([next(serialized[row['archived']]) for row in page])
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Não está na tabela quente: procura entre os arquivados
+            queryset = self._scoped_queryset(ArchivedOrder.objects.all(), ArchivedOrderItem)
+            order = get_object_or_404(queryset, pk=kwargs[self.lookup_field])
+            return Response(self.get_serializer(order).data)
+
     def perform_create(self, serializer):
         """
         Regras de negócio ao criar um pedido (Order):
@@ -97,35 +293,454 @@ class OrderViewSet(viewsets.ModelViewSet):
             if not table_id:
                 raise ValidationError({"detail": "O número da mesa é obrigatório para consumo no local."})
 
-            # Busca a mesa e valida o código
-            table = get_object_or_404(Table, pk=table_id)
-            
+            # Valida o código pelo cache de mesas (sem query)
+            table = serializer.validated_data.get('table')
+            if table is None:
+                raise NotFound('Mesa não encontrada.')
+
             # Se a mesa tiver um código definido, o cliente TEM que acertar
             if table.validation_code and table.validation_code != validation_code:
                 raise ValidationError({"detail": "Código de validação da mesa incorreto. Escaneie o QR Code novamente."})
 
             # Se passou na validação:
             # Pedido nasce como 'queued' (vai direto pra cozinha) pois pagam na saída
-            serializer.save(user=user, status='queued')
+            with transaction.atomic():
+                serializer.save(user=user, status='queued')
+                # Projeção das telas da cozinha na mesma transação do pedido
+                activate_order(serializer.instance, serializer.data)
+                bump_kitchen_version()
+
+            # Avisa as telas da cozinha que um novo pedido entrou na fila
+            publish_order_event('order.added', serializer.data)
+
+    def perform_update(self, serializer):
+        # Edição direta (PUT/PATCH) não muda o status (somente leitura no OrderSerializer):
+        # só as transições gravam os resumos de vendas (record_completed_orders).
+        # A projeção ActiveOrder ainda reflete tipo e mesa editados.
+        with transaction.atomic():
+            serializer.save()
+            refresh_active_orders([serializer.instance.pk])
+            bump_kitchen_version() # Mesa ou itens podem ter mudado
+
+    # Evento publicado para as telas da cozinha em cada status de destino
+    TRANSITION_EVENTS = {
+        'queued': 'order.added',
+        'preparing': 'order.updated',
+        'ready': 'order.removed',
+        'completed': 'order.removed',
+        'canceled': 'order.removed',
+    }
+
+    def _notify_transition(self, order_ids, status_to):
+        event = self.TRANSITION_EVENTS[status_to]
+
+        if event == 'order.added':
+            # Entrou na fila: a cozinha precisa do pedido completo
+            orders = Order.objects.filter(pk__in=order_ids).select_related('table').prefetch_related(
+                Prefetch('items', queryset=OrderItem.objects.select_related('dish'))
+            )
+            for order in orders:
+                publish_order_event(event, OrderSerializer(order).data)
+            return
+
+        for order_id in order_ids:
+            publish_order_event(event, {'id': order_id, 'status': status_to})
+
+    def _transition(self, status_to, message):
+        """
+        Executa a transição com UPDATE condicional (ver OrderQuerySet.transition).
+        404 se o pedido não existe; 409 se ele não está num status de origem válido
+        (ex.: outro cozinheiro já marcou o mesmo pedido).
+        """
+        try:
+            queryset = self.get_queryset().filter(pk=self.kwargs[self.lookup_field])
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound()
+
+        with transaction.atomic():
+            updated = queryset.transition(status_to)
+            if updated:
+                sync_active_orders([int(self.kwargs[self.lookup_field])], status_to)
+                if changes_kitchen(status_to):
+                    bump_kitchen_version()
+            if updated and status_to == 'completed':
+                # Resumos de vendas atualizados na mesma transação da conclusão
+                record_completed_orders([int(self.kwargs[self.lookup_field])])
+
+        if not updated:
+            current = queryset.values_list('status', flat=True).first()
+            if current is None:
+                raise NotFound()
+            return Response(
+                {'detail': f"Transição inválida: '{current}' -> '{status_to}'.", 'status': current},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        self._notify_transition([int(self.kwargs[self.lookup_field])], status_to)
+        return Response({'status': message})
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def bulk_transition(self, request):
+        """
+        Transição em lote (ex.: finalizar a mesa inteira de uma vez).
+        Corpo: {"status": "completed", "ids": [1, 2, 3]} ou {"status": "completed", "table": 4}
+        Os pedidos são travados, validados contra a máquina de estados e os válidos
+        mudam com um único UPDATE. Retorna o resultado de cada pedido.
+        URL: /api/orders/bulk_transition/
+        """
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        status_to = serializer.validated_data['status'] # type: ignore
+        sources = ORDER_TRANSITIONS[status_to]
+
+        with transaction.atomic():
+            queryset = Order.objects.select_for_update()
+            if 'table' in serializer.validated_data: # type: ignore
+                # Por mesa, só interessam os pedidos que podem fazer esta transição
+                queryset = queryset.filter(table_id=serializer.validated_data['table'], status__in=sources) # type: ignore
+                requested = None
+            else:
+                requested = list(dict.fromkeys(serializer.validated_data['ids'])) # type: ignore
+                queryset = queryset.filter(pk__in=requested)
+
+            current = dict(queryset.values_list('id', 'status'))
+            valid = [order_id for order_id, order_status in current.items() if order_status in sources]
+            if valid:
+                Order.objects.filter(pk__in=valid).transition(status_to)
+                sync_active_orders(valid, status_to)
+                if changes_kitchen(status_to):
+                    bump_kitchen_version()
+                if status_to == 'completed':
+                    record_completed_orders(valid)
+
+        results = []
+        for order_id in requested if requested is not None else sorted(current):
+            if order_id not in current:
+                results.append({'id': order_id, 'result': 'not_found'})
+            elif order_id in valid:
+                results.append({'id': order_id, 'result': 'updated', 'status': status_to})
+            else:
+                results.append({'id': order_id, 'result': 'conflict', 'status': current[order_id]})
+
+        if valid:
+            self._notify_transition(valid, status_to)
+        return Response({'updated': len(valid), 'results': results})
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Exporta o histórico em streaming, com memória constante (ver restaurant/exports.py).
+        URL: /api/orders/export/?output=csv|ndjson&created_after=2024-05-01&created_before=2024-05-31&status=completed
+        """
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'output': f"Formatos aceitos: {', '.join(EXPORT_FORMATS)}."})
+
+        # Arquivados primeiro (mais antigos), depois a tabela quente
+        querysets = [self._filter_created_at(ArchivedOrder.objects.all()), self._filter_created_at(Order.objects.all())]
+        if request.query_params.get('status'):
+            querysets = [queryset.filter(status=request.query_params['status']) for queryset in querysets]
+
+        # O streaming roda depois do fim da view: fixa o banco escolhido agora (réplica ou principal)
+        querysets = [queryset.using(queryset.db) for queryset in querysets]
+        content = export_orders(querysets, export_format)
+        if isinstance(request._request, ASGIRequest):
+            content = aiter_chunks(content)
+
+        content_type = 'text/csv; charset=utf-8' if export_format == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="pedidos.{export_format}"'
+        return response
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def kitchen_summary(self, request):
+        """
+        Visão consolidada da Cozinha: quantidades por prato na fila (queued/preparing),
+        espera do pedido mais antigo de cada prato e agrupamento por mesa.
+        O quadro fica em memória, mas confere a versão 'kitchen' no banco a cada leitura:
+        reflete qualquer pedido já commitado, inclusive por outros workers.
+        URL: /api/orders/kitchen_summary/
+        """
+        return Response(get_kitchen_board().summary())
+
+    @action(detail=True, methods=['patch'], permission_classes=[IsAdminUser])
+    def start_preparing(self, request, pk=None):
+        """
+        Cozinha começou a preparar o pedido (queued -> preparing)
+        URL: /api/orders/{id}/start_preparing/
+        """
+        return self._transition('preparing', 'Pedido em preparação')
 
     @action(detail=True, methods=['patch'], permission_classes=[IsAdminUser])
     def mark_ready(self, request, pk=None):
         """
-        Ação rápida para a Cozinha marcar pedido como 'Pronto'
+        Ação rápida para a Cozinha marcar pedido como 'Pronto' (queued/preparing -> ready)
         URL: /api/orders/{id}/mark_ready/
         """
-        order = self.get_object()
-        order.status = 'ready'
-        order.save()
-        return Response({'status': 'Pedido marcado como pronto'})
+        return self._transition('ready', 'Pedido marcado como pronto')
     
     @action(detail=True, methods=['patch'], permission_classes=[IsAdminUser])
     def mark_completed(self, request, pk=None):
         """
-        Ação para o Garçom marcar que entregou ou finalizou
+        Ação para o Garçom marcar que entregou ou finalizou (ready -> completed)
         URL: /api/orders/{id}/mark_completed/
         """
-        order = self.get_object()
-        order.status = 'completed'
-        order.save()
-        return Response({'status': 'Pedido finalizado'})
+        return self._transition('completed', 'Pedido finalizado')
+
+class ReportViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """
+    Relatórios gerenciais. Leem apenas as tabelas de resumo
+    (OrderSalesRollup / DishSalesRollup), nunca os pedidos.
+    """
+    permission_classes = [IsAdminUser]
+    query_budgets = {'sales': 1, 'throughput': 1}
+    replica_actions = {'sales', 'throughput'}
+
+    def _choice_param(self, name, choices, default):
+        value = self.request.query_params.get(name, default) # type: ignore
+        if value not in choices:
+            raise ValidationError({name: f"Valores aceitos: {', '.join(c for c in choices if c)}."})
+        return value
+
+    def _filter_period(self, queryset):
+        """
+        Período: ?start=2024-05-01&end=2024-05-31 (datas inclusivas)
+        Agrupamento: ?granularity=day|hour
+        Retorna o QuerySet filtrado e os campos do período.
+        """
+        for name, lookup in (('start', 'date__gte'), ('end', 'date__lte')):
+            value = self.request.query_params.get(name) # type: ignore
+            if not value:
+                continue
+            try:
+                day = parse_date(value)
+            except ValueError:
+                day = None
+            if day is None:
+                raise ValidationError({name: "Data inválida. Use AAAA-MM-DD."})
+            queryset = queryset.filter(**{lookup: day})
+
+        granularity = self._choice_param('granularity', ['day', 'hour'], 'day')
+        period = ['date', 'hour'] if granularity == 'hour' else ['date']
+        return queryset, period
+
+    @action(detail=False, methods=['get'])
+    def sales(self, request):
+        """
+        Vendas por período, opcionalmente por prato, tipo de pedido ou mesa.
+        URL: /api/reports/sales/?start=2024-05-01&end=2024-05-31&granularity=day&group_by=dish
+        """
+        group_by = self._choice_param('group_by', ['', 'dish', 'order_type', 'table'], '')
+
+        if group_by == 'dish':
+            queryset, period = self._filter_period(DishSalesRollup.objects.all())
+            fields = [*period, 'dish_id', 'dish__name']
+            rows = queryset.values(*fields).annotate(quantity=Sum('quantity'), revenue=Sum('revenue'))
+        else:
+            queryset, period = self._filter_period(OrderSalesRollup.objects.all())
+            fields = list(period)
+            if group_by == 'order_type':
+                fields.append('order_type')
+            elif group_by == 'table':
+                fields += ['table_id', 'table__number']
+            rows = queryset.values(*fields).annotate(orders=Sum('orders'), revenue=Sum('revenue'))
+
+        return Response(list(rows.order_by(*fields)))
+
+    @action(detail=False, methods=['get'])
+    def throughput(self, request):
+        """
+        Pedidos concluídos e ticket médio por período e tipo de pedido.
+        URL: /api/reports/throughput/?granularity=hour&start=2024-05-01
+        """
+        queryset, period = self._filter_period(OrderSalesRollup.objects.all())
+        fields = [*period, 'order_type']
+        rows = queryset.values(*fields).annotate(orders=Sum('orders'), revenue=Sum('revenue')).order_by(*fields)
+
+        for row in rows:
+            row['average_ticket'] = (row['revenue'] / row['orders']).quantize(Decimal('0.01')) if row['orders'] else None
+        return Response(list(rows))
+
+
+def _authenticate_user(request):
+    """
+    Aceita o mesmo Token das rotas DRF ou a sessão do Django.
+    Retorna o usuário autenticado, senão None. Síncrona: nas views async
+    rode com sync_to_async, pois a sessão e o token podem ir ao banco.
+    """
+    try:
+        auth = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+
+    user = auth[0] if auth else request.user
+    return user if user.is_authenticated else None
+
+
+def _authenticate_staff(request):
+    """
+    Retorna o usuário se for funcionário, senão None.
+    """
+    user = _authenticate_user(request)
+    return user if user is not None and user.is_staff else None
+
+
+def _kitchen_snapshot():
+    return active_order_payloads(KITCHEN_STATUSES)
+
+
+async def _kitchen_events():
+    broker = get_broker()
+    keepalive = getattr(settings, 'KITCHEN_STREAM_KEEPALIVE', 15)
+
+    # Inscreve antes do snapshot para não perder eventos entre os dois
+    queue = broker.subscribe()
+    try:
+        snapshot = await sync_to_async(_kitchen_snapshot)()
+        yield format_sse('snapshot', snapshot)
+
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n' # Mantém proxies e balanceadores com a conexão aberta
+                continue
+            if message['event'] == 'resync':
+                # O broker pode ter perdido eventos: a tela recomeça de um snapshot novo
+                yield format_sse('snapshot', await sync_to_async(_kitchen_snapshot)())
+                continue
+            yield format_sse(message['event'], message['data'])
+    finally:
+        broker.unsubscribe(queue)
+
+
+@require_GET
+async def kitchen_stream(request):
+    """
+    Canal em tempo real da Cozinha (Server-Sent Events), substitui o polling em ?mode=kitchen.
+    Envia um 'snapshot' da fila e depois eventos 'order.added' / 'order.removed'.
+    URL: /api/orders/stream/
+    """
+    user = await sync_to_async(_authenticate_staff)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Apenas funcionários acessam a visão da cozinha.'}, status=403)
+
+    response = StreamingHttpResponse(_kitchen_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Desativa buffer do nginx
+    return response
+
+
+# Views assíncronas (ASGI) para as leituras mais frequentes. Não usam o DRF:
+# uma view async pura não ocupa uma thread enquanto espera.
+
+def _json_with_etag(request, etag, data):
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    return JsonResponse(data, safe=False, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+
+async def _menu_items():
+    # Mesmo leitor e mesmo QuerySet de DishViewSet._get_menu: as duas montagens não divergem
+    reader = get_reader(DishSerializer)
+    return reader.build([row async for row in reader.values(DishViewSet.queryset.all())])
+
+
+@require_GET
+async def menu_async(request):
+    """
+    Mesmo conteúdo e ETag de GET /api/dishes/, do mesmo cache versionado, via ORM/cache assíncronos.
+    URL: /api/menu/
+    """
+    menu = await aget_menu(_menu_items)
+    return _json_with_etag(request, menu['etag'], menu['items'])
+
+
+@require_GET
+async def dish_async(request, pk):
+    """
+    URL: /api/menu/{id}/
+    """
+    menu = await aget_menu(_menu_items)
+    entry = menu['by_id'].get(str(pk))
+    if entry is None:
+        return JsonResponse({'detail': 'Não encontrado.'}, status=404)
+    etag, item = entry
+    return _json_with_etag(request, etag, item)
+
+
+async def _order_status(request, pk):
+    """
+    Status atual do pedido visto pelo usuário da requisição: (status, None) ou (None, resposta de erro).
+    Cliente só enxerga os próprios pedidos; funcionários enxergam todos.
+    """
+    user = await sync_to_async(_authenticate_user)(request)
+    if user is None:
+        return None, JsonResponse({'detail': 'As credenciais de autenticação não foram fornecidas.'}, status=401)
+
+    queryset = Order.objects.filter(pk=pk)
+    if not user.is_staff:
+        queryset = queryset.filter(user=user)
+    current = await queryset.values_list('status', flat=True).afirst()
+    if current is None:
+        return None, JsonResponse({'detail': 'Não encontrado.'}, status=404)
+    return current, None
+
+
+@require_GET
+async def order_status(request, pk):
+    """
+    "Meu pedido está pronto?" numa única query, sem serializar o pedido.
+    URL: /api/orders/{id}/status/
+    """
+    current, error = await _order_status(request, pk)
+    if error is not None:
+        return error
+    return JsonResponse({'id': pk, 'status': current})
+
+
+@require_GET
+async def order_wait(request, pk):
+    """
+    Long-poll: responde assim que o pedido sair do status informado (?status=, padrão o atual)
+    ou após ?timeout= segundos (no máximo ORDER_WAIT_TIMEOUT). A espera fica parada na fila
+    do broker de eventos da cozinha, sem thread nem conexão com o banco.
+    URL: /api/orders/{id}/wait/?status=queued&timeout=25
+    """
+    max_timeout = getattr(settings, 'ORDER_WAIT_TIMEOUT', 25)
+    try:
+        timeout = min(float(request.GET.get('timeout', max_timeout)), max_timeout)
+    except ValueError:
+        return JsonResponse({'timeout': 'Informe o tempo de espera em segundos.'}, status=400)
+
+    broker = get_broker()
+    # Inscreve antes de ler o status para não perder uma transição entre os dois
+    queue = broker.subscribe()
+    try:
+        current, error = await _order_status(request, pk)
+        if error is not None:
+            return error
+        known = request.GET.get('status') or current
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while current == known:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                # O broker em memória não vê transições de outros workers: confere no banco antes de responder
+                current = await Order.objects.filter(pk=pk).values_list('status', flat=True).afirst()
+                break
+            data = message['data']
+            if message['event'] == 'resync':
+                current = await Order.objects.filter(pk=pk).values_list('status', flat=True).afirst()
+            elif data.get('id') == pk and 'status' in data:
+                current = data['status']
+    finally:
+        broker.unsubscribe(queue)
+
+    return JsonResponse({'id': pk, 'status': current, 'changed': current != known})
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+O canal em tempo real da cozinha (/api/orders/stream/), o long-poll de status
+(/api/orders/{id}/wait/) e as leituras em /api/menu/ e /api/orders/{id}/status/
+são views assíncronas e só esperam sem ocupar uma thread quando servidas por este ASGI.
 """
 
 import os
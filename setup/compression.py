@@ -0,0 +1,99 @@
+"""
+Compressão das respostas: brotli quando o cliente aceita (Accept-Encoding: br),
+senão gzip (GZipMiddleware do Django).
+
+Respostas menores que 200 bytes e text/event-stream (o compressor seguraria os
+eventos no buffer) saem sem compressão. Com COMPRESSION_ENABLED = False o
+middleware se remove da pilha.
+
+Respostas com credenciais (login, cadastro, reset de senha, admin: os prefixos de
+COMPRESSION_BROTLI_EXCLUDE_PATHS, além de qualquer resposta que grave cookies)
+nunca saem em brotli, que não tem proteção contra BREACH: ficam com o gzip do
+Django, que acrescenta bytes aleatórios à saída comprimida.
+"""
+import brotli
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+MIN_SIZE = 200 # Mesmo limite do GZipMiddleware
+
+
+def brotli_quality():
+    # 4-5 é o equilíbrio usual para conteúdo dinâmico; 11 é lento demais por requisição
+    return getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+
+def _brotli_allowed(request, response):
+    if response.cookies:
+        return False
+    return not request.path.startswith(tuple(getattr(settings, 'COMPRESSION_BROTLI_EXCLUDE_PATHS', ())))
+
+
+def _compress_sequence(chunks):
+    compressor = brotli.Compressor(quality=brotli_quality())
+    for chunk in chunks:
+        # flush() por pedaço: a exportação continua chegando aos poucos ao cliente
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _acompress_sequence(chunks):
+    compressor = brotli.Compressor(quality=brotli_quality())
+    async for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Coloque-o logo abaixo de MetricsMiddleware: as métricas medem os bytes já comprimidos.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'COMPRESSION_ENABLED', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+        if not _brotli_allowed(request, response):
+            return super().process_response(request, response)
+
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _acompress_sequence(response.streaming_content)
+            else:
+                response.streaming_content = _compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=brotli_quality())
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # ETag forte vira fraca, como no GZipMiddleware (RFC 9110, 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
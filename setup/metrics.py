@@ -0,0 +1,277 @@
+"""
+Métricas de requisição no formato texto do Prometheus.
+
+MetricsMiddleware registra, por view (nome da rota do router, ex.: 'order-list',
+'order-mark-ready'), a latência, o número de queries, o tempo gasto no banco e
+o tamanho da resposta. Os caches da aplicação (cardápio, tokens, mesas, ...)
+reportam acertos e faltas com record_cache(). Tudo fica em memória no processo
+e é exposto em /metrics.
+
+Com METRICS_ENABLED = False o middleware se remove da pilha (MiddlewareNotUsed)
+e record_cache() não faz nada: o custo desligado é uma comparação.
+Cada worker do gunicorn tem os seus contadores; o scraper vê o worker que atendeu.
+"""
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Limites dos histogramas (segundos e queries)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Rótulo `method`: qualquer outro método vira 'other', para o cliente não criar séries à vontade
+HTTP_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+
+def metrics_enabled():
+    return getattr(settings, 'METRICS_ENABLED', False)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.total}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.total}'
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+        self.responses = {} # {status_code: total}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._views = {} # {(view, method): ViewMetrics}
+        self._caches = {} # {cache: [acertos, faltas]}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+            self._caches = {}
+
+    def observe_request(self, view, method, status_code, seconds, queries, db_seconds, size):
+        with self._lock:
+            metrics = self._views.get((view, method))
+            if metrics is None:
+                metrics = self._views[(view, method)] = ViewMetrics()
+            metrics.latency.observe(seconds)
+            if queries is not None:
+                metrics.queries.observe(queries)
+                metrics.db_seconds += db_seconds
+            if size is not None:
+                metrics.response_bytes += size
+            metrics.responses[status_code] = metrics.responses.get(status_code, 0) + 1
+
+    def observe_cache(self, name, hit):
+        with self._lock:
+            counts = self._caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def cache_ratio(self, name):
+        with self._lock:
+            hits, misses = self._caches.get(name, (0, 0))
+        return hits / (hits + misses) if hits + misses else None
+
+    def render(self):
+        with self._lock:
+            views = sorted(self._views.items())
+            caches = sorted(self._caches.items())
+
+        lines = [
+            '# HELP http_request_duration_seconds Latência das requisições por view.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (view, method), metrics in views:
+            lines.extend(metrics.latency.render('http_request_duration_seconds', f'view="{view}",method="{method}"'))
+
+        lines += [
+            '# HELP http_request_db_queries Queries SQL por requisição.',
+            '# TYPE http_request_db_queries histogram',
+        ]
+        for (view, method), metrics in views:
+            if metrics.queries.total:
+                lines.extend(metrics.queries.render('http_request_db_queries', f'view="{view}",method="{method}"'))
+
+        lines += [
+            '# HELP http_request_db_seconds_total Tempo gasto no banco.',
+            '# TYPE http_request_db_seconds_total counter',
+        ]
+        lines += [
+            f'http_request_db_seconds_total{{view="{view}",method="{method}"}} {metrics.db_seconds:.6f}'
+            for (view, method), metrics in views
+        ]
+
+        lines += [
+            '# HELP http_response_size_bytes_total Bytes enviados no corpo das respostas (exceto streaming).',
+            '# TYPE http_response_size_bytes_total counter',
+        ]
+        lines += [
+            f'http_response_size_bytes_total{{view="{view}",method="{method}"}} {metrics.response_bytes}'
+            for (view, method), metrics in views
+        ]
+
+        lines += [
+            '# HELP http_responses_total Respostas por código HTTP.',
+            '# TYPE http_responses_total counter',
+        ]
+        for (view, method), metrics in views:
+            lines += [
+                f'http_responses_total{{view="{view}",method="{method}",status="{code}"}} {total}'
+                for code, total in sorted(metrics.responses.items())
+            ]
+
+        lines += [
+            '# HELP app_cache_requests_total Leituras dos caches da aplicação.',
+            '# TYPE app_cache_requests_total counter',
+        ]
+        for name, (hits, misses) in caches:
+            lines.append(f'app_cache_requests_total{{cache="{name}",result="hit"}} {hits}')
+            lines.append(f'app_cache_requests_total{{cache="{name}",result="miss"}} {misses}')
+
+        return '\n'.join(lines) + '\n'
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry():
+    return _registry
+
+
+def record_cache(name, hit):
+    if metrics_enabled():
+        _registry.observe_cache(name, hit)
+
+
+class QueryTimer:
+    """
+    execute_wrapper que conta as queries e soma o tempo gasto em cada uma.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+def _method_label(request):
+    return request.method if request.method in HTTP_METHODS else 'other'
+
+
+def _response_size(response):
+    if getattr(response, 'streaming', False):
+        return None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """
+    Instrumenta cada requisição. Coloque-o no topo de MIDDLEWARE para medir a pilha inteira.
+    Com METRICS_SERVER_TIMING a resposta leva o cabeçalho Server-Timing
+    (app e db), visível no painel de rede do navegador.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', False)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        self._finish(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        # Em views assíncronas as queries rodam em outras threads: só latência e tamanho
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._finish(request, response, time.perf_counter() - start, None)
+        return response
+
+    def _finish(self, request, response, seconds, timer):
+        view = _view_name(request)
+        if view == 'metrics':
+            return
+        _registry.observe_request(
+            view, _method_label(request), response.status_code, seconds,
+            timer.count if timer else None,
+            timer.seconds if timer else 0.0,
+            _response_size(response),
+        )
+        if self.server_timing:
+            timing = [f'app;dur={seconds * 1000:.1f}']
+            if timer:
+                timing.append(f'db;dur={timer.seconds * 1000:.1f};desc="{timer.count} queries"')
+            response['Server-Timing'] = ', '.join(timing)
+
+
+def metrics_view(request):
+    """
+    GET /metrics. Exige 'Authorization: Bearer <METRICS_TOKEN>'; sem token configurado,
+    só responde com DEBUG ligado (fora dele, 404).
+    """
+    if not metrics_enabled():
+        return HttpResponse(status=404)
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=404)
+    elif request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
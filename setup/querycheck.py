@@ -0,0 +1,211 @@
+"""
+Auditoria de queries SQL nos testes.
+
+QueryAuditRunner (TEST_RUNNER em settings.py) coloca QueryAuditMiddleware no topo
+de MIDDLEWARE durante `python manage.py test`. Para cada requisição feita pelos
+clientes de teste (APITestCase, Client) o middleware grava todas as queries e:
+
+1. Aponta N+1: a mesma query (mesmo SQL, parâmetros ignorados) repetida
+   QUERY_AUDIT_REPEAT_THRESHOLD vezes ou mais na mesma requisição.
+2. Aplica o orçamento de queries declarado na própria viewset:
+
+       class OrderViewSet(viewsets.ModelViewSet):
+           query_budgets = {'list': 4, 'create': 8}
+
+Com QUERY_AUDIT_STRICT (padrão) qualquer violação faz a requisição levantar
+QueryBudgetExceeded, e o teste falha apontando a view e as queries. Ao fim da
+execução o runner imprime as violações e as queries mais lentas.
+
+Fora das requisições, use audit_queries() diretamente:
+
+    with audit_queries() as audit:
+        ...
+    audit.assert_no_repeats()
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Controle de transação dos testes, não conta como query da view
+IGNORED_SQL = re.compile(r'^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT|BEGIN|COMMIT)\b', re.IGNORECASE)
+IN_LIST = re.compile(r'IN \((%s(, )?)+\)')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """
+    Forma estrutural da query: `IN (%s, %s, ...)` vira `IN (...)` para listas de tamanhos diferentes
+    contarem como a mesma query.
+    """
+    return IN_LIST.sub('IN (...)', sql)
+
+
+class QueryAudit:
+    """
+    execute_wrapper que guarda (sql, duração) de cada query executada.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not IGNORED_SQL.match(sql):
+                self.queries.append((sql, time.perf_counter() - start))
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeats(self, threshold=None):
+        """
+        Queries estruturalmente iguais que se repetem `threshold` vezes ou mais: {sql: vezes}.
+        """
+        if threshold is None:
+            threshold = getattr(settings, 'QUERY_AUDIT_REPEAT_THRESHOLD', 3)
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return {sql: total for sql, total in counts.items() if total >= threshold}
+
+    def assert_no_repeats(self, threshold=None):
+        repeats = self.repeats(threshold)
+        if repeats:
+            raise QueryBudgetExceeded('Possível N+1:\n' + _format_repeats(repeats))
+
+    def assert_max_queries(self, budget):
+        if len(self) > budget:
+            raise QueryBudgetExceeded(
+                f'{len(self)} queries (orçamento: {budget}):\n' + '\n'.join(sql for sql, _ in self.queries)
+            )
+
+
+@contextmanager
+def audit_queries():
+    audit = QueryAudit()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(audit))
+        yield audit
+
+
+def _format_repeats(repeats):
+    return '\n'.join(f'  {total}x {sql}' for sql, total in sorted(repeats.items(), key=lambda item: -item[1]))
+
+
+def query_budget(request):
+    """
+    Orçamento da ação resolvida: `query_budgets[action]` da viewset, ou None.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view_class = getattr(match.func, 'cls', None)
+    budgets = getattr(view_class, 'query_budgets', None)
+    if not budgets:
+        return None
+    # ViewSet.as_view guarda o mapa método HTTP -> ação
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    return budgets.get(action)
+
+
+class AuditReport:
+    """
+    Acumula o resultado da execução: violações e as queries mais lentas.
+    """
+
+    def __init__(self):
+        self.violations = []
+        self.slowest = [] # [(duração, view, sql)]
+
+    def reset(self):
+        self.violations = []
+        self.slowest = []
+
+    def add(self, view, audit):
+        size = getattr(settings, 'QUERY_AUDIT_REPORT_SIZE', 10)
+        self.slowest.extend((seconds, view, sql) for sql, seconds in audit.queries)
+        self.slowest = sorted(self.slowest, reverse=True)[:size]
+
+    def render(self):
+        lines = []
+        if self.violations:
+            lines.append(f'Auditoria de queries: {len(self.violations)} violação(ões)')
+            lines.extend(f'  {violation}' for violation in self.violations)
+        if self.slowest:
+            lines.append('Queries mais lentas:')
+            lines.extend(f'  {seconds * 1000:8.2f} ms  {view}  {sql[:200]}' for seconds, view, sql in self.slowest)
+        return '\n'.join(lines)
+
+
+report = AuditReport()
+
+
+class QueryAuditMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            # Views assíncronas consultam o banco em outras threads; não há como atribuir as queries
+            return self.get_response(request)
+
+        with audit_queries() as audit:
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        view = f'{request.method} {match.view_name if match else request.path}'
+        report.add(view, audit)
+
+        problems = []
+        budget = query_budget(request)
+        if budget is not None and len(audit) > budget:
+            problems.append(f'{view}: {len(audit)} queries (orçamento: {budget})')
+        repeats = audit.repeats()
+        if repeats:
+            problems.append(f'{view}: possível N+1\n' + _format_repeats(repeats))
+
+        if problems:
+            report.violations.extend(problems)
+            if getattr(settings, 'QUERY_AUDIT_STRICT', True):
+                raise QueryBudgetExceeded(
+                    '\n'.join(problems) + '\nQueries:\n' + '\n'.join(sql for sql, _ in audit.queries)
+                )
+        return response
+
+
+class QueryAuditRunner(DiscoverRunner):
+    """
+    Test runner padrão do projeto: o DiscoverRunner com a auditoria de queries ligada.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        report.reset()
+        self._audit_settings = override_settings(
+            MIDDLEWARE=['setup.querycheck.QueryAuditMiddleware', *settings.MIDDLEWARE],
+        )
+        self._audit_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._audit_settings.disable()
+        super().teardown_test_environment(**kwargs)
+        output = report.render()
+        if output and self.verbosity > 0:
+            print(output)
@@ -0,0 +1,155 @@
+"""
+Leituras na réplica do banco.
+
+Com um alias REPLICA_DATABASE em DATABASES, ReplicaRouter manda para a réplica
+as leituras das ações que cada viewset declarar, e nada mais:
+
+    class OrderViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+        replica_actions = {'list', 'retrieve'}
+
+Escritas, transações e todas as outras views continuam no banco principal.
+
+Ler o que acabou de escrever: depois de uma requisição de escrita bem-sucedida
+o usuário fica preso ao principal por REPLICA_STICKY_SECONDS (marca no cache
+REPLICA_STICKY_CACHE, por usuário), cobrindo o atraso da replicação. Assim o
+cliente que acabou de fazer um pedido o vê no histórico. O cache precisa ser
+compartilhado entre os workers (SHARED_CACHE_URL): com LocMem, a leitura
+atendida por outro worker não veria a marca.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_alias():
+    """
+    Alias da réplica, ou None se ela não estiver configurada.
+    """
+    alias = getattr(settings, 'REPLICA_DATABASE', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def replica_reads():
+    """
+    Leituras dentro do bloco vão para a réplica (se houver uma).
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica e principal têm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica recebe o schema pela replicação
+        return db != replica_alias()
+
+
+def _sticky_key(user):
+    return f'replica:sticky:{user.pk}'
+
+
+def _sticky_cache():
+    return caches[getattr(settings, 'REPLICA_STICKY_CACHE', 'replica')]
+
+
+def stick_to_primary(user):
+    _sticky_cache().set(_sticky_key(user), True, timeout=getattr(settings, 'REPLICA_STICKY_SECONDS', 5))
+
+
+def is_sticky(user):
+    return bool(user and user.is_authenticated and _sticky_cache().get(_sticky_key(user)))
+
+
+class ReplicaReadMixin:
+    """
+    Viewset que lê da réplica nas ações de `replica_actions` (só GET/HEAD/OPTIONS
+    e só se o usuário não escreveu nada nos últimos REPLICA_STICKY_SECONDS).
+    """
+    replica_actions = ()
+
+    def use_replica(self, request):
+        return (
+            request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and replica_alias() is not None
+            and not is_sticky(request.user)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Depois da autenticação: a aderência ao principal depende do usuário
+        if self.use_replica(request):
+            self._replica_token = _replica_reads.set(True)
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # Também quando a view levanta uma exceção que o DRF não trata
+            if self._replica_token is not None:
+                _replica_reads.reset(self._replica_token)
+
+
+class ReplicaStickyMiddleware:
+    """
+    Marca o usuário que acabou de escrever (método não seguro, resposta < 400)
+    para que as próximas leituras dele vão ao principal.
+    Síncrono e assíncrono: sob ASGI não obriga as views async a rodarem numa thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if replica_alias() is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._is_write(request, response):
+            self._stick(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._is_write(request, response):
+            # request.user é preguiçoso e pode consultar o banco: fora do event loop
+            await sync_to_async(self._stick)(request)
+        return response
+
+    def _is_write(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
+
+    def _stick(self, request):
+        # O DRF repassa o usuário autenticado por token para o HttpRequest
+        user = getattr(request, 'user', None)
+        if user and user.is_authenticated:
+            stick_to_primary(user)
@@ -46,11 +46,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'setup.metrics.MetricsMiddleware', # Primeiro, para medir a pilha inteira (setup/metrics.py)
+    'setup.compression.CompressionMiddleware', # brotli/gzip (setup/compression.py)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'setup.routers.ReplicaStickyMiddleware', # Leitura do principal logo após uma escrita
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,6 +90,10 @@ if os.environ.get('DB_NAME'):
             'PASSWORD': os.environ.get('DB_PASSWORD'),
             'HOST': os.environ.get('DB_HOST'),
             'PORT': '3306',
+            # Reaproveita a conexão entre requisições em vez de abrir uma nova a cada uma.
+            # No modo ASGI use DB_CONN_MAX_AGE=0: lá as conexões não são reaproveitadas entre threads.
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)), # Em segundos
+            'CONN_HEALTH_CHECKS': True, # Testa a conexão reaproveitada antes de usar
         }
     }
 else:
@@ -97,8 +104,116 @@ else:
         }
     }
 
+# Réplica de leitura (setup/routers.py): só as ações listadas em `replica_actions` das viewsets leem dela.
+# MySQL: defina DB_REPLICA_HOST. SQLite: a réplica é o próprio db.sqlite3, ou outro arquivo com
+# SQLITE_REPLICA_NAME (copie o banco para ele para simular uma réplica atrasada).
+if os.environ.get('DB_NAME'):
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {**DATABASES['default'], 'HOST': os.environ.get('DB_REPLICA_HOST')}
+else:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / os.environ.get('SQLITE_REPLICA_NAME', 'db.sqlite3'),
+    }
+if 'replica' in DATABASES:
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'} # Nos testes a réplica é o banco de teste principal
+
+DATABASE_ROUTERS = ['setup.routers.ReplicaRouter']
+REPLICA_DATABASE = 'replica'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# 'menu' guarda o cardápio público versionado (restaurant/cache.py).
+# Em memória local por padrão, o que só é correto com um único worker: com mais de um,
+# defina SHARED_CACHE_URL (redis://...; MENU_CACHE_URL também é aceito) para compartilhar
+# 'menu', 'idempotency', 'replica' e 'auth' entre os workers. O docker-compose já sobe o Redis.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'menu': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'menu',
+    },
+    # Respostas gravadas de Idempotency-Key quando IDEMPOTENCY_STORE usa o cache
+    'idempotency': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'idempotency',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Marcas de "leia do principal" após uma escrita (setup/routers.py), por usuário
+    'replica': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'replica',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Cache token -> usuário do CachedTokenAuthentication (users/authentication.py).
+    # TIMEOUT curto limita quanto tempo outro worker pode enxergar um usuário já desativado.
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+        'TIMEOUT': 60, # Em segundos
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+SHARED_CACHE_URL = os.environ.get('SHARED_CACHE_URL') or os.environ.get('MENU_CACHE_URL')
+
+if SHARED_CACHE_URL:
+    for alias in ('menu', 'idempotency', 'replica', 'auth'):
+        CACHES[alias] = {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': SHARED_CACHE_URL,
+            'KEY_PREFIX': alias, # Mesmo Redis para todos os caches, sem colisão de chaves
+            'TIMEOUT': CACHES[alias].get('TIMEOUT', 300),
+        }
+
+MENU_CACHE_TIMEOUT = 60 * 60 * 24 # Em segundos
+
+# Idempotency-Key na criação de pedidos (restaurant/idempotency.py).
+# O backend de banco serializa requisições duplicadas entre workers; o de cache
+# ('restaurant.idempotency.CacheIdempotencyStore') só se o cache for compartilhado.
+IDEMPOTENCY_STORE = 'restaurant.idempotency.DatabaseIdempotencyStore'
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24 # Em segundos
+IDEMPOTENCY_WAIT_TIMEOUT = 0 # Em segundos (no máximo 2): espera por uma duplicata em andamento; 0 = 409 na hora
+
+# Métricas por view em /metrics (setup/metrics.py)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '1' if DEBUG else '0') == '1'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') # /metrics exige 'Authorization: Bearer <token>'; sem ele, só com DEBUG
+
+# Compressão das respostas (setup/compression.py): brotli se o cliente aceitar, senão gzip
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+COMPRESSION_BROTLI_QUALITY = 5
+# Rotas com tokens/credenciais na resposta: só gzip, com o enchimento aleatório contra BREACH
+COMPRESSION_BROTLI_EXCLUDE_PATHS = ['/api/users/', '/api/password_reset/', '/admin/']
+
+# Testes: auditoria de queries por requisição (setup/querycheck.py).
+# Orçamentos ficam nas viewsets (query_budgets); N+1 = mesma query repetida a partir deste limite.
+TEST_RUNNER = 'setup.querycheck.QueryAuditRunner'
+QUERY_AUDIT_STRICT = True
+QUERY_AUDIT_REPEAT_THRESHOLD = 3
+
+# Long-poll de status do pedido (/api/orders/{id}/wait/): espera máxima, abaixo do timeout dos proxies
+ORDER_WAIT_TIMEOUT = 25 # Em segundos
+
+# Pedidos concluídos/cancelados mais antigos que isto vão para as tabelas de arquivo (archive_orders)
+ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', 90))
+
+# Depois de escrever, o usuário lê do principal por este tempo (cobre o atraso da réplica).
+# A marca fica no cache próprio 'replica', compartilhado entre workers com SHARED_CACHE_URL.
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+REPLICA_STICKY_CACHE = 'replica'
+
+# Eventos da cozinha (SSE e long-poll): o broker em memória só entrega dentro do próprio
+# processo; com SHARED_CACHE_URL os eventos passam pelo pub/sub do Redis e chegam a todos os workers
+KITCHEN_EVENTS_URL = os.environ.get('KITCHEN_EVENTS_URL') or SHARED_CACHE_URL
+KITCHEN_EVENTS_BROKER = (
+    'restaurant.events.RedisBroker' if KITCHEN_EVENTS_URL else 'restaurant.events.InProcessBroker'
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -140,7 +255,7 @@ STATIC_URL = 'static/'
 # DRF Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication', # Lê o cabeçalho 'Authorization: Token ...'
+        'users.authentication.CachedTokenAuthentication', # Lê o cabeçalho 'Authorization: Token ...' (com cache)
         'rest_framework.authentication.SessionAuthentication', # Habilita a autenticação via sessão (cookies)
     ],
     
@@ -152,6 +267,13 @@ REST_FRAMEWORK = {
 # Email backend para desenvolvimento - imprime emails no console
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Fila de e-mails em segundo plano (users/mail.py)
+EMAIL_QUEUE_WORKERS = 1 # Threads de envio por processo
+EMAIL_QUEUE_BATCH_SIZE = 20 # E-mails enviados por conexão SMTP
+EMAIL_QUEUE_MAX_RETRIES = 3
+EMAIL_QUEUE_RETRY_DELAY = 2 # Em segundos, multiplicado pela tentativa
+EMAIL_QUEUE_SHUTDOWN_TIMEOUT = 10 # Em segundos: espera pela fila ao encerrar o processo (abaixo do graceful_timeout do gunicorn)
+
 # django-rest-passwordreset
 DJANGO_REST_PASSWORDRESET_NO_INFORMATION_LEAKAGE = True
 DJANGO_REST_MULTITOKENAUTH_RESET_TOKEN_EXPIRY_TIME = 3 # Em horas
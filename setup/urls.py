@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from setup.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/users/', include('users.urls'), name='users'),
     path('api/', include('restaurant.urls'), name='restaurant'),
     path('api/password_reset/', include('django_rest_passwordreset.urls', namespace='password_reset')),
@@ -0,0 +1,50 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from setup.metrics import record_cache
+
+
+def get_auth_cache():
+    return caches[getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'auth')]
+
+
+def token_cache_key(key):
+    # Não guardamos o token em texto puro como chave do cache
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    get_auth_cache().delete(token_cache_key(key))
+
+
+def invalidate_user_tokens(user):
+    keys = Token.objects.filter(user=user).values_list('key', flat=True)
+    get_auth_cache().delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication com cache de token -> usuário.
+    Evita o JOIN authtoken_token/users_user a cada requisição.
+    O cache 'auth' é limitado (MAX_ENTRIES) e expira em poucos segundos (TIMEOUT);
+    os sinais em users/signals.py invalidam a entrada quando o token é trocado
+    ou o usuário é alterado (ativação, tipo, senha).
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_auth_cache()
+        cache_key = token_cache_key(key)
+
+        cached = cache.get(cache_key)
+        record_cache('auth', cached is not None)
+        if cached is not None:
+            return cached
+
+        # Valida no banco (token inexistente ou usuário inativo levantam AuthenticationFailed)
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, (user, token))
+        return user, token
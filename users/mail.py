@@ -0,0 +1,167 @@
+"""
+Fila de envio de e-mails em segundo plano.
+
+O sinal de reset de senha apenas enfileira o e-mail; threads do próprio processo
+renderizam os templates e enviam em lotes, reaproveitando uma única conexão SMTP
+por lote e tentando novamente apenas os e-mails que falharam. Assim a requisição
+HTTP não fica presa esperando o servidor de e-mail.
+
+A fila vive na memória do processo: no desligamento (inclusive na reciclagem do
+worker pelo max_requests do gunicorn) o processo espera até
+EMAIL_QUEUE_SHUTDOWN_TIMEOUT segundos para esvaziá-la antes de sair.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    def __init__(self, workers=1, batch_size=20):
+        self.workers = workers
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, subject, to, context, text_template, html_template=None,
+                from_email='noreply@somehost.local'):
+        self._start()
+        self._queue.put({
+            'subject': subject,
+            'to': to,
+            'from_email': from_email,
+            'context': context,
+            'text_template': text_template,
+            'html_template': html_template,
+        })
+
+    def join(self, timeout=None):
+        """
+        Bloqueia até a fila esvaziar (usado em testes e no desligamento).
+        Com timeout, desiste depois desse tempo e retorna False se ainda houver e-mails.
+        """
+        if timeout is None:
+            self._queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def drain(self):
+        """
+        Chamado no encerramento do processo (atexit): as threads de envio são daemon
+        e morreriam com os e-mails ainda na fila.
+        """
+        if not self.join(getattr(settings, 'EMAIL_QUEUE_SHUTDOWN_TIMEOUT', 10)):
+            logger.error('Processo encerrado com %d e-mail(s) não enviados.', self._queue.unfinished_tasks)
+
+    def _start(self):
+        # Threads criadas sob demanda: com Gunicorn isso acontece depois do fork
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for _ in range(self.workers - len(self._threads)):
+                thread = threading.Thread(target=self._run, name='mail-queue', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < self.batch_size:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._send_batch(jobs)
+            except Exception:
+                logger.exception('Falha ao enviar lote de %d e-mail(s).', len(jobs))
+            finally:
+                for _ in jobs:
+                    self._queue.task_done()
+
+    def _send_batch(self, jobs):
+        pending = []
+        for job in jobs:
+            # Um template com erro perde só o próprio e-mail, não o lote inteiro
+            try:
+                pending.append(self._render(job))
+            except Exception:
+                logger.exception('Falha ao renderizar e-mail "%s" para %s (%s).',
+                                 job['subject'], ', '.join(job['to']), job['text_template'])
+        if not pending:
+            return
+        max_retries = getattr(settings, 'EMAIL_QUEUE_MAX_RETRIES', 3)
+        retry_delay = getattr(settings, 'EMAIL_QUEUE_RETRY_DELAY', 2) # Em segundos, cresce a cada tentativa
+
+        for attempt in range(1, max_retries + 1):
+            pending = self._send(pending)
+            if not pending:
+                return
+            if attempt < max_retries:
+                logger.warning('%d e-mail(s) não enviados (tentativa %d/%d).', len(pending), attempt, max_retries)
+                time.sleep(retry_delay * attempt)
+        logger.error('Desistindo de %d e-mail(s) após %d tentativas.', len(pending), max_retries)
+
+    def _send(self, messages):
+        """
+        Envia pela mesma conexão, um e-mail por vez. Retorna os que falharam.
+        """
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception:
+            logger.warning('Falha ao conectar ao servidor de e-mail.', exc_info=True)
+            return messages
+
+        failed = []
+        try:
+            for message in messages:
+                try:
+                    if not connection.send_messages([message]):
+                        failed.append(message)
+                except Exception:
+                    logger.warning('Falha ao enviar e-mail para %s.', ', '.join(message.to), exc_info=True)
+                    failed.append(message)
+        finally:
+            connection.close()
+        return failed
+
+    def _render(self, job):
+        message = EmailMultiAlternatives(
+            job['subject'],
+            render_to_string(job['text_template'], job['context']),
+            job['from_email'],
+            job['to'],
+        )
+        if job['html_template']:
+            message.attach_alternative(render_to_string(job['html_template'], job['context']), 'text/html')
+        return message
+
+
+_mail_queue = None
+_mail_queue_lock = threading.Lock()
+
+
+def get_mail_queue():
+    global _mail_queue
+    with _mail_queue_lock:
+        if _mail_queue is None:
+            _mail_queue = MailQueue(
+                workers=getattr(settings, 'EMAIL_QUEUE_WORKERS', 1),
+                batch_size=getattr(settings, 'EMAIL_QUEUE_BATCH_SIZE', 20),
+            )
+            atexit.register(_mail_queue.drain)
+        return _mail_queue
@@ -1,9 +1,32 @@
-from django.core.mail import EmailMultiAlternatives
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.template.loader import render_to_string
 from django.urls import reverse
 
 from django_rest_passwordreset.signals import reset_password_token_created
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user_tokens
+from .mail import get_mail_queue
+from .models import User
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """
+    Token criado, trocado ou removido: descarta a entrada do cache de autenticação.
+    """
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, created, **kwargs):
+    """
+    Qualquer alteração no usuário (toggle_active, change_type, senha...)
+    descarta o usuário em cache para a próxima requisição ler do banco.
+    """
+    if not created:
+        invalidate_user_tokens(instance)
 
 
 @receiver(reset_password_token_created)
@@ -28,19 +51,11 @@ def password_reset_token_created(sender, instance, reset_password_token, *args,
             reset_password_token.key)
     }
 
-    # render email text
-    email_html_message = render_to_string('email/user_reset_password.html', context)
-    email_plaintext_message = render_to_string('email/user_reset_password.txt', context)
-
-    msg = EmailMultiAlternatives(
-        # title:
-        "Password Reset for {title}".format(title="Some website title"),
-        # message:
-        email_plaintext_message,
-        # from:
-        "noreply@somehost.local",
-        # to:
-        [reset_password_token.user.email]
+    # Renderização e envio acontecem na fila (users/mail.py): a requisição não espera o SMTP
+    get_mail_queue().enqueue(
+        subject="Password Reset for {title}".format(title="Some website title"),
+        to=[reset_password_token.user.email],
+        context=context,
+        text_template='email/user_reset_password.txt',
+        html_template='email/user_reset_password.html',
     )
-    msg.attach_alternative(email_html_message, "text/html")
-    msg.send()
\ No newline at end of file
@@ -1,3 +1,184 @@
-from django.test import TestCase
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
 
-# Create your tests here.
+from .authentication import get_auth_cache
+from .mail import MailQueue, get_mail_queue
+from .models import User
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        get_auth_cache().clear()
+
+        self.admin = User.objects.create_superuser(username='admin', password='123', email='admin@example.com', type='admin')
+        self.user = User.objects.create_user(username='garcom', password='123', email='garcom@example.com', type='staff')
+        self.token = Token.objects.create(user=self.user)
+        self.url_me = reverse('user-me')
+
+        # Cliente separado: force_authenticate(None) apagaria as credenciais do client principal
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(user=self.admin)
+
+    def authenticate(self, token=None):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {(token or self.token).key}')
+
+    def test_token_lookup_is_cached(self):
+        """
+        A partir da segunda requisição o token é resolvido sem ir ao banco.
+        """
+        self.authenticate()
+        self.assertEqual(self.client.get(self.url_me).status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url_me)
+        self.assertEqual(response.data['username'], 'garcom') # type: ignore
+
+    def test_toggle_active_invalidates_cache(self):
+        """
+        Usuário desativado perde o acesso imediatamente, mesmo com token em cache.
+        """
+        self.authenticate()
+        self.client.get(self.url_me)
+
+        self.admin_client.post(reverse('user-toggle-active', args=[self.user.pk]))
+
+        response = self.client.get(self.url_me)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['detail'].code, 'authentication_failed') # type: ignore
+
+    def test_change_type_invalidates_cache(self):
+        """
+        Mudança de tipo aparece na próxima requisição do usuário.
+        """
+        self.authenticate()
+        self.client.get(self.url_me)
+
+        self.admin_client.post(reverse('user-change-type', args=[self.user.pk]), {'type': 'customer'})
+
+        self.assertEqual(self.client.get(self.url_me).data['type'], 'customer') # type: ignore
+
+    def test_rotated_token_is_rejected(self):
+        """
+        Token antigo deixa de valer assim que é trocado.
+        """
+        self.authenticate()
+        self.client.get(self.url_me)
+
+        self.token.delete()
+        new_token = Token.objects.create(user=self.user)
+
+        self.assertEqual(self.client.get(self.url_me).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.authenticate(new_token)
+        self.assertEqual(self.client.get(self.url_me).status_code, status.HTTP_200_OK)
+
+
+class FlakyEmailBackend(locmem.EmailBackend):
+    """
+    Backend de testes que falha na primeira tentativa de envio.
+    """
+    attempts = 0
+
+    def send_messages(self, messages):
+        FlakyEmailBackend.attempts += 1
+        if FlakyEmailBackend.attempts == 1:
+            raise ConnectionError('SMTP indisponível')
+        return super().send_messages(messages)
+
+
+class RejectingEmailBackend(locmem.EmailBackend):
+    """
+    Backend de testes que recusa, uma vez, os e-mails para rejeitado@example.com.
+    """
+    rejected = []
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'rejeitado@example.com' in message.to and not RejectingEmailBackend.rejected:
+                RejectingEmailBackend.rejected.append(message)
+                raise ConnectionError('Destinatário recusado')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_QUEUE_RETRY_DELAY=0)
+class PasswordResetEmailTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cliente', password='123', email='cliente@example.com')
+        self.url = reverse('password_reset:reset-password-request')
+
+    def test_reset_email_sent_in_background(self):
+        """
+        A requisição só enfileira; o e-mail (texto + HTML) sai pela fila.
+        """
+        response = self.client.post(self.url, {'email': 'cliente@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        get_mail_queue().join()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['cliente@example.com'])
+        self.assertIn('token=', mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html') # type: ignore
+
+    @override_settings(EMAIL_BACKEND='users.tests.FlakyEmailBackend')
+    def test_reset_email_retried_on_failure(self):
+        """
+        Falha temporária do SMTP é tentada novamente.
+        """
+        FlakyEmailBackend.attempts = 0
+        with self.assertLogs('users.mail', 'WARNING'):
+            self.client.post(self.url, {'email': 'cliente@example.com'})
+            get_mail_queue().join()
+
+        self.assertEqual(FlakyEmailBackend.attempts, 2)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_BACKEND='users.tests.RejectingEmailBackend')
+    def test_only_failed_emails_are_retried(self):
+        """
+        Um e-mail recusado no lote não reenvia os que já saíram.
+        """
+        RejectingEmailBackend.rejected = []
+        jobs = [
+            {
+                'subject': 'Teste', 'to': [to], 'from_email': 'noreply@somehost.local', 'context': {},
+                'text_template': 'email/user_reset_password.txt', 'html_template': None,
+            }
+            for to in ('a@example.com', 'rejeitado@example.com', 'b@example.com')
+        ]
+        with self.assertLogs('users.mail', 'WARNING'):
+            MailQueue()._send_batch(jobs)
+
+        self.assertEqual(len(RejectingEmailBackend.rejected), 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['a@example.com', 'b@example.com', 'rejeitado@example.com'])
+
+    def test_render_failure_skips_only_that_email(self):
+        """
+        Um template com erro descarta só o próprio e-mail; o restante do lote é enviado.
+        """
+        job = {
+            'subject': 'Teste', 'from_email': 'noreply@somehost.local', 'context': {},
+            'text_template': 'email/user_reset_password.txt', 'html_template': None,
+        }
+        jobs = [
+            {**job, 'to': ['a@example.com']},
+            {**job, 'to': ['quebrado@example.com'], 'text_template': 'email/nao_existe.txt'},
+            {**job, 'to': ['b@example.com']},
+        ]
+        with self.assertLogs('users.mail', 'ERROR') as logs:
+            MailQueue()._send_batch(jobs)
+
+        self.assertIn('quebrado@example.com', logs.output[0])
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['a@example.com', 'b@example.com'])
+
+    def test_queue_drained_with_timeout(self):
+        queue = MailQueue()
+        self.assertTrue(queue.join(timeout=0))
+        queue._queue.put({}) # Sem threads de envio: nunca esvazia
+        self.assertFalse(queue.join(timeout=0.1))
@@ -51,6 +51,8 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserAdminSerializer
     permission_classes = [IsAdminUser]
+    # Máximo de queries por ação, conferido nos testes (setup/querycheck.py)
+    query_budgets = {'list': 1, 'change_type': 3, 'toggle_active': 3}
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def change_type(self, request, pk=None):